@@ -0,0 +1,79 @@
+import argparse
+import re
+from bench_parse import load_pages, time_it
+from contact_extractor import extract_contact_details
+from page_parser import make_soup
+
+
+def legacy_extract(soup):
+    """The per-call regex extraction this benchmark compares against."""
+    contact_info = {
+        'email': 'Not Available',
+        'phone': 'Not Available',
+        'address': 'Not Available',
+        'website': 'Not Available'
+    }
+    sections = [
+        soup.find('div', {'id': 'contact-details'}),
+        soup.find('div', {'class': 'col-md-6'}),
+        soup.find('div', {'class': 'company-details'}),
+        soup.find('div', {'class': 'contact-info'})
+    ]
+    all_text = ''
+    for section in sections:
+        if section:
+            all_text += section.get_text() + ' '
+
+    email_pattern = r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}'
+    email_matches = re.findall(email_pattern, all_text)
+    if email_matches:
+        contact_info['email'] = email_matches[0]
+    phone_pattern = r'(?:(?:\+|0{0,2})91(\s*[\-]\s*)?|[0]?)?[789]\d{9}'
+    phone_matches = re.findall(phone_pattern, all_text)
+    if phone_matches:
+        contact_info['phone'] = phone_matches[0]
+    website_pattern = r'(?:https?:\/\/)?(?:www\.)?[a-zA-Z0-9-]+(?:\.[a-zA-Z]{2,})+(?:\/[^\s]*)?'
+    website_matches = re.findall(website_pattern, all_text)
+    if website_matches:
+        contact_info['website'] = website_matches[0]
+
+    address_elements = soup.find_all(['p', 'div', 'span'], string=re.compile(r'[A-Za-z0-9\s,\.-]+'))
+    for element in address_elements:
+        text = element.get_text(strip=True)
+        if len(text) > 20 and not re.search(email_pattern, text) and not re.search(website_pattern, text):
+            contact_info['address'] = text
+            break
+    return contact_info
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare contact extraction against the per-call regex version')
+    parser.add_argument('--dir', default='html_files', help='directory of saved .html pages')
+    parser.add_argument('--limit', type=int, default=200, help='maximum pages to load')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per implementation; the best is reported')
+    args = parser.parse_args()
+
+    pages = load_pages(args.dir, args.limit)
+    if not pages:
+        print(f"No .html files found under {args.dir}")
+        return
+    # Parse once up front so only extraction is timed
+    soups = [make_soup(html) for html in pages]
+    print(f"{len(soups)} pages from {args.dir}")
+
+    baseline = time_it('legacy regex extraction', soups, legacy_extract, args.repeat)
+    per_page = time_it('contact_extractor', soups, extract_contact_details, args.repeat)
+    print(f"{'':<32} {baseline / per_page:8.1f}x vs baseline")
+
+    # Fields where the two disagree; phone differs by design (the old code kept a regex group)
+    differences = {}
+    for soup in soups:
+        old, new = legacy_extract(soup), extract_contact_details(soup)
+        for field in old:
+            if old[field] != new[field]:
+                differences[field] = differences.get(field, 0) + 1
+    print(f"Fields differing from legacy: {differences or 'none'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+import argparse
+import time
+from bs4 import BeautifulSoup
+from page_parser import BACKENDS, make_soup
+from reparse import iter_html_files
+
+
+def load_pages(directory, limit):
+    pages = []
+    for path in iter_html_files(directory):
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            pages.append(f.read())
+        if limit and len(pages) >= limit:
+            break
+    return pages
+
+
+def time_it(label, pages, parse, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for html in pages:
+            parse(html)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    per_page = best / len(pages) * 1000
+    print(f"{label:<32} {per_page:8.2f} ms/page")
+    return per_page
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare HTML parser backends on saved pages')
+    parser.add_argument('--dir', default='html_files', help='directory of saved .html pages')
+    parser.add_argument('--scope', action='append', help="subtree selector, e.g. 'div#statups_data' (repeatable)")
+    parser.add_argument('--limit', type=int, default=200, help='maximum pages to load')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per backend; the best is reported')
+    args = parser.parse_args()
+
+    pages = load_pages(args.dir, args.limit)
+    if not pages:
+        print(f"No .html files found under {args.dir}")
+        return
+    print(f"{len(pages)} pages from {args.dir}, scope={args.scope}")
+
+    baseline = time_it('html.parser (full document)', pages,
+                       lambda html: BeautifulSoup(html, 'html.parser'), args.repeat)
+    for backend in BACKENDS:
+        per_page = time_it(f'{backend} (scoped)', pages,
+                           lambda html: make_soup(html, scope=args.scope, backend=backend), args.repeat)
+        print(f"{'':<32} {baseline / per_page:8.1f}x vs baseline")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+import argparse
+import csv
+import logging
+import os
+from name_matcher import DEFAULT_THRESHOLD, NameMatcher, canonical_name
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SOURCES = ['zauba_companies.csv']
+# Anything below the matcher's strict threshold goes to the network search
+DEFAULT_CUTOFF = DEFAULT_THRESHOLD
+
+
+class CinIndex:
+    """Local name -> CIN lookup built from the listing crawl output.
+
+    Exact lookups hit a dict keyed by the canonical name, so legal-suffix
+    spellings (PVT LTD / PRIVATE LIMITED) already agree. Misses fall back to
+    name_matcher's blocked fuzzy match, accepted only at or above `cutoff`
+    (0.92 by default) and only when no other name scores within MIN_MARGIN
+    of it; a different legal form never matches.
+    A name shared by several companies resolves to all of them, like a
+    search that returns several exact rows.
+    """
+
+    def __init__(self, cutoff=DEFAULT_CUTOFF):
+        self.cutoff = cutoff
+        self.entries = {}
+        self.matcher = NameMatcher(threshold=cutoff)
+
+    def add(self, cin, name, address=''):
+        key = canonical_name(name)
+        if not cin or not key:
+            return
+        if key not in self.entries:
+            self.matcher.add(key)
+        rows = self.entries.setdefault(key, [])
+        if not any(row['CIN'] == cin for row in rows):
+            rows.append({'CIN': cin, 'Name': name, 'Address': address or ''})
+
+    def load_csv(self, path):
+        """Add every CIN/Name(/Address) row of a CSV; returns the rows read."""
+        count = 0
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            for row in csv.DictReader(f):
+                self.add((row.get('CIN') or '').strip(), (row.get('Name') or '').strip(), row.get('Address'))
+                count += 1
+        return count
+
+    @classmethod
+    def from_files(cls, paths=DEFAULT_SOURCES, cutoff=DEFAULT_CUTOFF):
+        index = cls(cutoff)
+        for path in paths:
+            if os.path.exists(path):
+                count = index.load_csv(path)
+                logger.info(f"Indexed {count} rows from {path}")
+            else:
+                logger.warning(f"CIN index source not found: {path}")
+        return index
+
+    def __len__(self):
+        return len(self.entries)
+
+    def lookup(self, name):
+        """Return (rows, score) for a name, or (None, 0.0) when nothing is close enough."""
+        key = canonical_name(name)
+        if not key:
+            return None, 0.0
+        rows = self.entries.get(key)
+        if rows:
+            return rows, 1.0
+        match = self.matcher.best(key)
+        if match is None:
+            return None, 0.0
+        matched_key, _, score = match
+        return self.entries[matched_key], score
+
+    def resolve_many(self, names):
+        """Split names into ({name: (rows, score)}, [unresolved names])."""
+        resolved = {}
+        missing = []
+        for name in names:
+            rows, score = self.lookup(name)
+            if rows:
+                resolved[name] = (rows, score)
+            else:
+                missing.append(name)
+        return resolved, missing
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description='Resolve company names to CINs from local listings')
+    parser.add_argument('names', help='file with one company name per line, e.g. AdTech_SI_Names.csv')
+    parser.add_argument('--source', action='append', help='CIN/Name CSV to index (repeatable)')
+    parser.add_argument('--cutoff', type=float, default=DEFAULT_CUTOFF, help='minimum fuzzy similarity')
+    parser.add_argument('--output', default='resolved_cins.csv')
+    args = parser.parse_args()
+
+    index = CinIndex.from_files(args.source or DEFAULT_SOURCES, cutoff=args.cutoff)
+    with open(args.names, 'r', encoding='utf-8') as f:
+        names = [line.strip() for line in f if line.strip()]
+    resolved, missing = index.resolve_many(names)
+
+    with open(args.output, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=['Query', 'CIN', 'Name', 'Score'])
+        writer.writeheader()
+        for query, (rows, score) in resolved.items():
+            for row in rows:
+                writer.writerow({'Query': query, 'CIN': row['CIN'], 'Name': row['Name'], 'Score': f'{score:.3f}'})
+    logger.info(f"Resolved {len(resolved)}/{len(names)} names offline; {len(missing)} need a search")
+
+
+if __name__ == '__main__':
+    main()
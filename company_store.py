@@ -0,0 +1,234 @@
+import argparse
+import csv
+import glob
+import logging
+import math
+import time
+from name_matcher import canonical_name
+from sqlite_store import SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_COMPANY_DB = 'companies.sqlite'
+
+# Values that mean "the source did not have it"; they never overwrite or count as known
+MISSING_VALUES = {'', 'not available', 'n/a', 'nan', 'none'}
+
+# Existing outputs and how their columns map onto store fields: (glob, source, {column: field})
+KNOWN_OUTPUTS = [
+    ('zauba_companies.csv', 'zauba_listing', {'CIN': 'cin', 'Name': 'name'}),
+    ('company_data.csv', 'zauba_search', {'CIN': 'cin', 'Name': 'name', 'Address': 'registered_address'}),
+    ('contact_details_*.csv', 'zauba_contact', {'cin': 'cin', 'company_name': 'name', 'email': 'email',
+                                                'phone': 'phone', 'website': 'website'}),
+    ('company_emails*.csv', 'wintro', {'cin': 'cin', 'company_name': 'name', 'email': 'email'}),
+    ('tofler_ultra_company_data.csv', 'tofler', {
+        'cin': 'cin', 'name': 'name', 'incorporation_date': 'incorporation_date', 'status': 'status',
+        'authorized_capital': 'authorized_capital', 'paid_up_capital': 'paid_up_capital',
+        'registered_address': 'registered_address', 'email': 'email', 'pan': 'pan', 'agm': 'agm',
+        'company_type': 'company_type', 'directors': 'directors'
+    }),
+    ('startinup_companies.csv', 'startinup', {'Company Name': 'name', 'Location': 'location',
+                                              'Industry': 'industry', 'URL': 'website'}),
+    ('startup_uttarakhand.csv', 'startup_uk', {'Startup Name': 'name', 'Email': 'email'}),
+    ('startup_india_companies*.csv', 'startup_india', {'Company Name': 'name'}),
+]
+
+
+def is_missing(value):
+    if value is None:
+        return True
+    if isinstance(value, float) and math.isnan(value):
+        return True
+    return str(value).strip().lower() in MISSING_VALUES
+
+
+def normalize_cin(cin):
+    """CIN in the form every store keys it by: stripped and uppercase."""
+    return str(cin).strip().upper()
+
+
+class CompanyStore(SQLiteStore):
+    """Every company any scraper has seen, merged under its CIN.
+
+    Canonical names (name_matcher.canonical_name) are secondary keys, so a
+    source that only knows a name can still find the company. Each field
+    value is kept per source with the time it was seen, so the merged view
+    can say where a value came from and how old it is. Scrapers ask
+    `has_fields` / `known_cins` before scheduling a fetch and `upsert` what
+    they find. Connection and transactions come from sqlite_store.SQLiteStore.
+    """
+
+    def __init__(self, path=DEFAULT_COMPANY_DB):
+        super().__init__(path)
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS companies (
+                cin TEXT PRIMARY KEY,
+                name TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS names (
+                name_key TEXT NOT NULL,
+                cin TEXT NOT NULL,
+                PRIMARY KEY (name_key, cin)
+            )
+        """)
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS fields (
+                cin TEXT NOT NULL,
+                field TEXT NOT NULL,
+                source TEXT NOT NULL,
+                value TEXT NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (cin, field, source)
+            )
+        """)
+        self.db.execute("CREATE INDEX IF NOT EXISTS fields_by_field ON fields(field, updated_at)")
+
+    def upsert(self, cin, source, name=None, fields=None, seen_at=None):
+        """Record what `source` knows about a company; missing values are ignored."""
+        if is_missing(cin):
+            return False
+        cin = normalize_cin(cin)
+        now = seen_at or time.time()
+        with self.batch():
+            self.db.execute(
+                "INSERT INTO companies (cin, name, created_at, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(cin) DO UPDATE SET name = COALESCE(companies.name, excluded.name), "
+                "updated_at = excluded.updated_at",
+                (cin, None if is_missing(name) else str(name).strip(), now, now)
+            )
+            values = dict(fields or {})
+            if not is_missing(name):
+                values.setdefault('name', name)
+                self.db.execute("INSERT OR IGNORE INTO names (name_key, cin) VALUES (?, ?)",
+                                (canonical_name(name), cin))
+            self.db.executemany(
+                "INSERT OR REPLACE INTO fields (cin, field, source, value, updated_at) VALUES (?, ?, ?, ?, ?)",
+                [(cin, field, source, str(value).strip(), now)
+                 for field, value in values.items() if not is_missing(value)]
+            )
+        return True
+
+    def upsert_many(self, records, source):
+        """Upsert dicts with a 'cin' key (plus 'name' and any fields) in one transaction."""
+        count = 0
+        with self.batch():
+            for record in records:
+                record = dict(record)
+                cin = record.pop('cin', None)
+                name = record.pop('name', None)
+                count += self.upsert(cin, source, name=name, fields=record)
+        return count
+
+    def resolve_name(self, name):
+        """CINs recorded under this company's canonical name."""
+        with self.lock:
+            rows = self.db.execute("SELECT cin FROM names WHERE name_key = ?", (canonical_name(name),)).fetchall()
+        return [row[0] for row in rows]
+
+    def get(self, cin):
+        """Merged view: the newest value of each field, with its source and timestamp, or None."""
+        with self.lock:
+            rows = self.db.execute(
+                "SELECT field, value, source, updated_at FROM fields WHERE cin = ? ORDER BY updated_at",
+                (normalize_cin(cin),)
+            ).fetchall()
+        if not rows:
+            return None
+        record = {'cin': normalize_cin(cin), 'provenance': {}}
+        for field, value, source, updated_at in rows:
+            record[field] = value
+            record['provenance'][field] = (source, updated_at)
+        return record
+
+    def has_fields(self, cin, fields, max_age=None):
+        """True if every field has a value for this CIN (seen within max_age seconds, if given)."""
+        if is_missing(cin):
+            return False
+        fields = list(fields)
+        since = 0 if max_age is None else time.time() - max_age
+        with self.lock:
+            row = self.db.execute(
+                f"SELECT COUNT(DISTINCT field) FROM fields WHERE cin = ? AND updated_at >= ? "
+                f"AND field IN ({', '.join('?' for _ in fields)})",
+                (normalize_cin(cin), since, *fields)
+            ).fetchone()
+        return row[0] == len(set(fields))
+
+    def known_cins(self, fields, max_age=None):
+        """Set of CINs that have every one of `fields`, for filtering a whole work list at once."""
+        fields = list(fields)
+        since = 0 if max_age is None else time.time() - max_age
+        with self.lock:
+            rows = self.db.execute(
+                f"SELECT cin FROM fields WHERE updated_at >= ? AND field IN ({', '.join('?' for _ in fields)}) "
+                f"GROUP BY cin HAVING COUNT(DISTINCT field) = ?",
+                (since, *fields, len(set(fields)))
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def unique_cin(self, name):
+        """The CIN recorded under this name, or None when there is none or several companies share it."""
+        cins = self.resolve_name(name)
+        return cins[0] if len(cins) == 1 else None
+
+    def import_csv(self, path, source, columns):
+        """Merge an existing output file; rows without a CIN are matched by name or skipped.
+
+        A name shared by several companies cannot say which one a row is
+        about, so such rows are skipped rather than copied onto all of them.
+        """
+        imported = skipped = ambiguous = 0
+        with open(path, 'r', encoding='utf-8', newline='') as f, self.batch():
+            for row in csv.DictReader(f):
+                record = {field: row.get(column) for column, field in columns.items()}
+                cin = record.pop('cin', None)
+                name = record.pop('name', None)
+                if is_missing(cin):
+                    cins = self.resolve_name(name) if not is_missing(name) else []
+                    if len(cins) > 1:
+                        ambiguous += 1
+                        logger.debug(f"'{name}' names {len(cins)} companies, skipping its {source} row")
+                        continue
+                    if not cins:
+                        skipped += 1
+                        continue
+                    cin = cins[0]
+                self.upsert(cin, source, name=name, fields=record)
+                imported += 1
+        logger.info(f"Imported {imported} rows from {path} as {source} "
+                    f"({skipped} without a known CIN, {ambiguous} with a name shared by several CINs)")
+        return imported
+
+    def import_known_outputs(self):
+        """Merge every scraper output present in the working directory; CIN sources go first."""
+        for pattern, source, columns in KNOWN_OUTPUTS:
+            for path in sorted(glob.glob(pattern)):
+                self.import_csv(path, source, columns)
+
+    def counts(self):
+        with self.lock:
+            companies = self.db.execute("SELECT COUNT(*) FROM companies").fetchone()[0]
+            fields = dict(self.db.execute("SELECT field, COUNT(DISTINCT cin) FROM fields GROUP BY field").fetchall())
+        return companies, fields
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description='Merge scraper outputs into the CIN-keyed company store')
+    parser.add_argument('--db', default=DEFAULT_COMPANY_DB)
+    args = parser.parse_args()
+    store = CompanyStore(args.db)
+    try:
+        store.import_known_outputs()
+        companies, fields = store.counts()
+        logger.info(f"{companies} companies; companies per field: {fields}")
+    finally:
+        store.close()
+
+
+if __name__ == '__main__':
+    main()
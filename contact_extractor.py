@@ -0,0 +1,132 @@
+import re
+from bs4 import NavigableString
+
+EMAIL_PATTERN = r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}'
+PHONE_PATTERN = r'(?:(?:\+|0{0,2})91(?:\s*[\-]\s*)?|[0]?)?[789]\d{9}'
+WEBSITE_PATTERN = r'(?:https?:\/\/)?(?:www\.)?[a-zA-Z0-9-]+(?:\.[a-zA-Z]{2,})+(?:\/[^\s]*)?'
+
+# Sections of a company page that carry contact details, searched in this order
+CONTACT_SECTIONS = [
+    ('div', {'id': 'contact-details'}),
+    ('div', {'class': 'col-md-6'}),
+    ('div', {'class': 'company-details'}),
+    ('div', {'class': 'contact-info'}),
+]
+
+NOT_AVAILABLE = 'Not Available'
+
+
+class ContactExtractor:
+    """Extract email, phone, website and address from a parsed page in one pass.
+
+    A single walk over the document finds the contact sections and the first
+    address candidate (a p/div/span whose only content is one string)
+    together, instead of one find per section plus a find_all with two regex
+    searches per element. Phones are matched in their own pass and blanked
+    out, then email and website share one compiled alternation that stops
+    as soon as both have a match, so a phone run into a URL or address
+    ('9876543210www.acme.com') is not swallowed by it.
+    """
+
+    def __init__(self, sections=CONTACT_SECTIONS, address_tags=('p', 'div', 'span'), min_address_length=20):
+        self.sections = sections
+        self.section_names = frozenset(name for name, _ in sections)
+        self.address_tags = frozenset(address_tags)
+        self.min_address_length = min_address_length
+        # Digits on either side mean the match is part of a longer number
+        self.phone_re = re.compile(rf'(?<!\d){PHONE_PATTERN}(?!\d)')
+        self.fields_re = re.compile(f'(?P<email>{EMAIL_PATTERN})|(?P<website>{WEBSITE_PATTERN})')
+        self.link_re = re.compile(f'{EMAIL_PATTERN}|{WEBSITE_PATTERN}')
+        self.address_chars_re = re.compile(r'[A-Za-z0-9\s,\.-]')
+
+    def section_matches(self, tag, spec):
+        name, attrs = spec
+        if tag.name != name:
+            return False
+        for attr, value in attrs.items():
+            actual = tag.get(attr)
+            if isinstance(actual, list):
+                if value not in actual:
+                    return False
+            elif actual != value:
+                return False
+        return True
+
+    def address_candidate(self, node):
+        """The stripped text of a string if it is the sole content of a p/div/span and not an email or URL."""
+        text = node.strip()
+        if len(text) <= self.min_address_length or not self.address_chars_re.search(node):
+            return None
+        # Walk up through elements whose .string is this node
+        parent = node.parent
+        while parent is not None and len(parent.contents) == 1:
+            if parent.name in self.address_tags:
+                return None if self.link_re.search(text) else text
+            parent = parent.parent
+        return None
+
+    def scan(self, soup):
+        """One walk over the document: the first tag matching each section spec, and the address.
+
+        Stops as soon as every section and an address have been found.
+        """
+        sections = [None] * len(self.sections)
+        missing = len(sections)
+        address = None
+        for node in soup.descendants:
+            if isinstance(node, NavigableString):
+                if address is None:
+                    address = self.address_candidate(node)
+                    if address is not None and not missing:
+                        break
+                continue
+            if missing and node.name in self.section_names:
+                for index, spec in enumerate(self.sections):
+                    if sections[index] is None and self.section_matches(node, spec):
+                        sections[index] = node
+                        missing -= 1
+                if not missing and address is not None:
+                    break
+        return sections, address
+
+    def section_text(self, sections):
+        """Text of the found sections in order, skipping any already covered by an earlier one."""
+        found = []
+        for section in sections:
+            if section is None or any(section is prev or prev in section.parents for prev in found):
+                continue
+            found.append(section)
+        # Separate the strings of adjacent elements so their values cannot run together
+        return ' '.join(section.get_text(' ') for section in found)
+
+    def match_fields(self, text):
+        """First email, website and phone in `text`: phones first, then the rest with phones blanked out."""
+        fields = {}
+        phone = self.phone_re.search(text)
+        if phone is not None:
+            fields['phone'] = phone.group()
+            text = self.phone_re.sub(' ', text)
+        for match in self.fields_re.finditer(text):
+            kind = match.lastgroup
+            if kind not in fields:
+                fields[kind] = match.group(kind)
+                if 'email' in fields and 'website' in fields:
+                    break
+        return fields
+
+    def extract(self, soup):
+        sections, address = self.scan(soup)
+        fields = self.match_fields(self.section_text(sections))
+        return {
+            'email': fields.get('email', NOT_AVAILABLE),
+            'phone': fields.get('phone', NOT_AVAILABLE),
+            'address': address or NOT_AVAILABLE,
+            'website': fields.get('website', NOT_AVAILABLE),
+        }
+
+_default_extractor = ContactExtractor()
+
+
+def extract_contact_details(soup):
+    """Contact details from a parsed company page using the shared extractor."""
+    return _default_extractor.extract(soup)
@@ -0,0 +1,67 @@
+import asyncio
+import logging
+from rate_limiter import get_budget
+
+logger = logging.getLogger(__name__)
+
+
+class PageCrawler:
+    """Fetch a range of pages concurrently within a per-host politeness budget.
+
+    `fetch_page(page)` is a blocking callable (it runs in a worker thread) that
+    returns the parsed result for a page or raises. `handle_result(page, result,
+    error)` is called on the event loop strictly in page order; returning False
+    from it stops the crawl and cancels the pages still outstanding. Pages in
+    `prefetched` (page -> result, e.g. ListingProbe.rows) are used as they
+    are, without a fetch or a budget slot.
+    """
+
+    def __init__(self, host, fetch_page, handle_result, rate=1.0, burst=1, max_in_flight=4):
+        self.budget = get_budget(host, rate=rate, burst=burst, max_in_flight=max_in_flight)
+        self.fetch_page = fetch_page
+        self.handle_result = handle_result
+
+    async def crawl(self, pages, prefetched=None):
+        pages = list(pages)
+        prefetched = {page: result for page, result in (prefetched or {}).items() if result is not None}
+        semaphore = asyncio.Semaphore(self.budget.max_in_flight)
+        finished = {}
+        state = {'next': 0, 'stopped': False}
+
+        def emit_ready():
+            # Release results in page order as soon as the head of the line is done
+            while not state['stopped'] and state['next'] in finished:
+                index = state['next']
+                result, error = finished.pop(index)
+                state['next'] += 1
+                if self.handle_result(pages[index], result, error) is False:
+                    state['stopped'] = True
+                    for task in tasks:
+                        if not task.done():
+                            task.cancel()
+
+        async def run_one(index, page):
+            if page in prefetched:
+                finished[index] = (prefetched.pop(page), None)
+                emit_ready()
+                return
+            async with semaphore:
+                if state['stopped']:
+                    return
+                await self.budget.bucket.acquire()
+                try:
+                    result = await asyncio.to_thread(self.fetch_page, page)
+                    error = None
+                except Exception as e:
+                    logger.debug(f"Error fetching page {page}: {str(e)}")
+                    result, error = None, e
+            finished[index] = (result, error)
+            emit_ready()
+
+        tasks = [asyncio.create_task(run_one(i, page)) for i, page in enumerate(pages)]
+        await asyncio.gather(*tasks, return_exceptions=True)
+        return state['next']
+
+    def run(self, pages, prefetched=None):
+        """Blocking entry point; returns the number of pages handed to handle_result."""
+        return asyncio.run(self.crawl(pages, prefetched))
@@ -0,0 +1,250 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+import requests
+from requests.structures import CaseInsensitiveDict
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = 'http_cache'
+DEFAULT_TTL = 24 * 3600  # seconds before an entry is revalidated
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024  # compressed bytes kept on disk
+
+
+def normalize_url(url):
+    """Canonical form of a URL for cache keys: lower-case scheme/host, no default port, sorted query, no fragment."""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    port = parts.port
+    if port and not ((scheme == 'http' and port == 80) or (scheme == 'https' and port == 443)):
+        host = f"{host}:{port}"
+    path = parts.path or '/'
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit((scheme, host, path, query, ''))
+
+
+def url_key(url):
+    return hashlib.sha256(normalize_url(url).encode('utf-8')).hexdigest()
+
+
+def read_object(path, encoding=None):
+    """Read and decode a cached body file; usable from worker processes."""
+    with open(path, 'rb') as f:
+        return zlib.decompress(f.read()).decode(encoding or 'utf-8', errors='replace')
+
+
+class HTTPCache:
+    """On-disk HTTP response cache with conditional revalidation.
+
+    Bodies are zlib-compressed and stored by the SHA-256 of their content, so
+    identical pages served under different URLs are kept once. A SQLite index
+    maps the normalized URL to its body, ETag and Last-Modified. Entries
+    younger than `ttl` are served without touching the network; older ones
+    are revalidated with If-None-Match/If-Modified-Since. When the store
+    exceeds `max_bytes` the least recently used entries are evicted.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.objects_dir = os.path.join(cache_dir, 'objects')
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(os.path.join(cache_dir, 'index.sqlite'), check_same_thread=False)
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                body_hash TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                status INTEGER NOT NULL,
+                content_type TEXT,
+                encoding TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                fetched_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self.db.execute("CREATE INDEX IF NOT EXISTS entries_last_access ON entries(last_access)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS entries_body_hash ON entries(body_hash)")
+        self.db.commit()
+
+    def _object_path(self, body_hash):
+        return os.path.join(self.objects_dir, body_hash[:2], body_hash + '.z')
+
+    def _lookup(self, url):
+        row = self.db.execute(
+            "SELECT key, url, body_hash, status, content_type, encoding, etag, last_modified, fetched_at "
+            "FROM entries WHERE key = ?", (url_key(url),)
+        ).fetchone()
+        if not row:
+            return None
+        keys = ('key', 'url', 'body_hash', 'status', 'content_type', 'encoding', 'etag', 'last_modified', 'fetched_at')
+        return dict(zip(keys, row))
+
+    def _read_body(self, entry):
+        try:
+            with open(self._object_path(entry['body_hash']), 'rb') as f:
+                return zlib.decompress(f.read())
+        except (OSError, zlib.error) as e:
+            logger.warning(f"Dropping unreadable cache entry for {entry['url']}: {str(e)}")
+            self.db.execute("DELETE FROM entries WHERE key = ?", (entry['key'],))
+            self.db.commit()
+            return None
+
+    def lookup(self, url):
+        """Return (entry, body) for a cached URL, or (None, None)."""
+        with self.lock:
+            entry = self._lookup(url)
+            if entry is None:
+                return None, None
+            body = self._read_body(entry)
+            if body is None:
+                return None, None
+            self.db.execute("UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), entry['key']))
+            self.db.commit()
+            return entry, body
+
+    def is_fresh(self, entry):
+        return time.time() - entry['fetched_at'] < self.ttl
+
+    def store(self, url, body, status=200, headers=None, encoding=None):
+        """Store a response body for a URL (bytes or str)."""
+        if isinstance(body, str):
+            encoding = encoding or 'utf-8'
+            body = body.encode(encoding)
+        headers = headers or {}
+        body_hash = hashlib.sha256(body).hexdigest()
+        path = self._object_path(body_hash)
+        with self.lock:
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                compressed = zlib.compress(body, 6)
+                tmp_path = path + '.tmp'
+                with open(tmp_path, 'wb') as f:
+                    f.write(compressed)
+                os.replace(tmp_path, path)
+            size = os.path.getsize(path)
+            key = url_key(url)
+            old = self.db.execute("SELECT body_hash FROM entries WHERE key = ?", (key,)).fetchone()
+            now = time.time()
+            self.db.execute(
+                "INSERT OR REPLACE INTO entries "
+                "(key, url, body_hash, size, status, content_type, encoding, etag, last_modified, fetched_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, normalize_url(url), body_hash, size, status, headers.get('Content-Type'), encoding,
+                 headers.get('ETag'), headers.get('Last-Modified'), now, now)
+            )
+            if old and old[0] != body_hash:
+                self._drop_object_if_unused(old[0])
+            self.db.commit()
+            self._evict()
+
+    def touch(self, url, headers=None):
+        """Mark an entry as freshly validated (after a 304)."""
+        headers = headers or {}
+        with self.lock:
+            now = time.time()
+            self.db.execute(
+                "UPDATE entries SET fetched_at = ?, last_access = ?, "
+                "etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified) WHERE key = ?",
+                (now, now, headers.get('ETag'), headers.get('Last-Modified'), url_key(url))
+            )
+            self.db.commit()
+
+    def _drop_object_if_unused(self, body_hash):
+        if self.db.execute("SELECT 1 FROM entries WHERE body_hash = ? LIMIT 1", (body_hash,)).fetchone():
+            return
+        try:
+            os.remove(self._object_path(body_hash))
+        except OSError:
+            pass
+
+    def total_bytes(self):
+        # Each object counts once even when several URLs share it
+        row = self.db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM (SELECT DISTINCT body_hash, size FROM entries)"
+        ).fetchone()
+        return row[0]
+
+    def _evict(self):
+        total = self.total_bytes()
+        if total <= self.max_bytes:
+            return
+        for key, body_hash in self.db.execute(
+                "SELECT key, body_hash FROM entries ORDER BY last_access ASC").fetchall():
+            if total <= self.max_bytes:
+                break
+            self.db.execute("DELETE FROM entries WHERE key = ?", (key,))
+            if not self.db.execute("SELECT 1 FROM entries WHERE body_hash = ? LIMIT 1", (body_hash,)).fetchone():
+                path = self._object_path(body_hash)
+                try:
+                    total -= os.path.getsize(path)
+                    os.remove(path)
+                except OSError:
+                    pass
+        self.db.commit()
+
+    def iter_entries(self, url_prefix=''):
+        """Yield (url, object_path, encoding) for cached pages whose URL starts with url_prefix."""
+        prefix = normalize_url(url_prefix) if url_prefix else ''
+        with self.lock:
+            rows = self.db.execute("SELECT url, body_hash, encoding FROM entries ORDER BY url").fetchall()
+        for url, body_hash, encoding in rows:
+            if url.startswith(prefix):
+                yield url, self._object_path(body_hash), encoding
+
+    def build_response(self, entry, body):
+        """Rebuild a requests.Response from a cache entry."""
+        response = requests.Response()
+        response._content = body
+        response.status_code = entry['status']
+        response.url = entry['url']
+        response.encoding = entry['encoding']
+        response.headers = CaseInsensitiveDict()
+        if entry['content_type']:
+            response.headers['Content-Type'] = entry['content_type']
+        if entry['etag']:
+            response.headers['ETag'] = entry['etag']
+        if entry['last_modified']:
+            response.headers['Last-Modified'] = entry['last_modified']
+        response.from_cache = True
+        return response
+
+    def get(self, send, url, headers=None, store=True, **kwargs):
+        """GET `url` through the cache; `send(url, headers=..., **kwargs)` performs the network request.
+
+        With store=False a 200 is returned without being cached, for callers
+        that check the page first and store() it themselves.
+        """
+        entry, body = self.lookup(url)
+        if entry is not None and self.is_fresh(entry):
+            return self.build_response(entry, body)
+
+        request_headers = dict(headers or {})
+        if entry is not None:
+            if entry['etag']:
+                request_headers['If-None-Match'] = entry['etag']
+            if entry['last_modified']:
+                request_headers['If-Modified-Since'] = entry['last_modified']
+
+        response = send(url, headers=request_headers, **kwargs)
+        if entry is not None and response.status_code == 304:
+            self.touch(url, response.headers)
+            return self.build_response(entry, body)
+        if response.status_code == 200 and store:
+            self.store(url, response.content, status=200, headers=response.headers, encoding=response.encoding)
+        response.from_cache = False
+        return response
+
+    def close(self):
+        with self.lock:
+            self.db.close()
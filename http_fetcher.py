@@ -0,0 +1,116 @@
+import logging
+import threading
+from functools import partial
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# Advertise brotli only when the decoder is installed, otherwise urllib3 hands back raw bytes
+try:
+    import brotli  # noqa: F401
+    ACCEPT_ENCODING = 'gzip, deflate, br'
+except ImportError:
+    ACCEPT_ENCODING = 'gzip, deflate'
+
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+    'Accept-Encoding': ACCEPT_ENCODING,
+    'Connection': 'keep-alive'
+}
+
+# (connect, read) timeout in seconds
+DEFAULT_TIMEOUT = (10, 30)
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter that applies a default timeout to every request."""
+
+    def __init__(self, *args, timeout=DEFAULT_TIMEOUT, **kwargs):
+        self.timeout = timeout
+        super().__init__(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+        return super().send(request, **kwargs)
+
+
+class Fetcher:
+    """Keep-alive HTTP client shared by the scrapers.
+
+    Connections are pooled per host by urllib3, so consecutive pages from the
+    same site reuse one TCP+TLS connection instead of opening a new one.
+    Pass an existing session (e.g. a cloudscraper one) to keep its own
+    adapters and only get the shared timeout and header handling. With a
+    `cache` (an http_cache.HTTPCache) GETs are served from disk when fresh
+    and revalidated conditionally when stale.
+    """
+
+    def __init__(self, session=None, pool_connections=10, pool_maxsize=10,
+                 timeout=DEFAULT_TIMEOUT, headers=None, max_retries=0, cache=None):
+        self.timeout = timeout
+        self.cache = cache
+        if session is None:
+            session = requests.Session()
+            adapter = TimeoutHTTPAdapter(
+                timeout=timeout,
+                pool_connections=pool_connections,
+                pool_maxsize=pool_maxsize,
+                max_retries=max_retries
+            )
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            session.headers.update(DEFAULT_HEADERS)
+        self.session = session
+        if headers:
+            self.session.headers.update(headers)
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        return self.session.request(method, url, **kwargs)
+
+    def get(self, url, use_cache=True, **kwargs):
+        if self.cache is not None and use_cache:
+            return self.cache.get(partial(self.request, 'GET'), url, **kwargs)
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def close(self):
+        self.session.close()
+        if self.cache is not None:
+            self.cache.close()
+
+
+_default_fetcher = None
+_default_lock = threading.Lock()
+
+
+def get_fetcher():
+    """Return the process-wide default Fetcher, creating it on first use."""
+    global _default_fetcher
+    if _default_fetcher is None:
+        with _default_lock:
+            if _default_fetcher is None:
+                _default_fetcher = Fetcher()
+                logger.debug("Created shared HTTP fetcher")
+    return _default_fetcher
+
+
+def configure(**kwargs):
+    """Replace the default Fetcher, e.g. to change timeouts or pool sizes."""
+    global _default_fetcher
+    with _default_lock:
+        if _default_fetcher is not None:
+            _default_fetcher.close()
+        _default_fetcher = Fetcher(**kwargs)
+    return _default_fetcher
+
+
+def fetch(url, **kwargs):
+    """GET a URL through the shared pooled session."""
+    return get_fetcher().get(url, **kwargs)
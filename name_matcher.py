@@ -0,0 +1,268 @@
+import re
+import numpy as np
+
+# A fuzzy hit is written out and the name never searched again, so only near-certain matches
+# count: 'Sharma Traders' vs VERMA TRADERS already scores 0.74
+DEFAULT_THRESHOLD = 0.92
+# How far the best of several fuzzy candidates must score above the runner-up to be picked
+MIN_MARGIN = 0.05
+# Tokens shorter than this are never typo-corrected for blocking; too many near neighbours
+MIN_VARIANT_LENGTH = 4
+
+_PUNCTUATION = re.compile(r'[^A-Z0-9 ]+')
+_SPACES = re.compile(r'\s+')
+
+# Abbreviations of legal-form words, mapped to the form the registry uses. Only legal forms
+# belong here: anything else would make distinct companies share a canonical name
+LEGAL_TOKENS = {
+    'PVT': 'PRIVATE',
+    'PRIV': 'PRIVATE',
+    'LTD': 'LIMITED',
+    'LMT': 'LIMITED',
+    'CORP': 'CORPORATION',
+    'INC': 'INCORPORATED',
+}
+
+# Canonical legal forms, longest first, stripped off to get the distinctive part of a name
+LEGAL_SUFFIXES = [
+    ('PRIVATE', 'LIMITED'),
+    ('ONE', 'PERSON', 'COMPANY'),
+    ('OPC', 'PRIVATE', 'LIMITED'),
+    ('LIMITED', 'LIABILITY', 'PARTNERSHIP'),
+    ('LIMITED',),
+    ('LLP',),
+    ('OPC',),
+]
+LEGAL_SUFFIXES.sort(key=len, reverse=True)
+
+
+def canonical_name(name):
+    """Uppercase, punctuation-free name with legal-form spellings made canonical.
+
+    'Acme Pvt. Ltd.', 'ACME PRIVATE LIMITED' and 'acme p ltd' all become
+    'ACME PRIVATE LIMITED'.
+    """
+    name = str(name).upper().replace('&', ' AND ')
+    tokens = _SPACES.sub(' ', _PUNCTUATION.sub(' ', name)).split()
+    tokens = [LEGAL_TOKENS.get(token, token) for token in tokens]
+    # 'P LTD' is shorthand for PRIVATE LIMITED
+    if len(tokens) >= 2 and tokens[-2] == 'P' and tokens[-1] == 'LIMITED':
+        tokens[-2] = 'PRIVATE'
+    return ' '.join(tokens)
+
+
+def split_legal_suffix(canonical):
+    """Return (core, suffix) for a canonical name, e.g. ('ACME', 'PRIVATE LIMITED')."""
+    tokens = canonical.split()
+    for suffix in LEGAL_SUFFIXES:
+        if len(tokens) > len(suffix) and tuple(tokens[-len(suffix):]) == suffix:
+            return ' '.join(tokens[:-len(suffix)]), ' '.join(suffix)
+    return canonical, ''
+
+
+def name_grams(text):
+    """Hashed character trigrams of a name, as an int64 array without duplicates."""
+    padded = f' {text} '
+    grams = {hash(padded[i:i + 3]) for i in range(len(padded) - 2)}
+    return np.fromiter(grams, dtype=np.int64, count=len(grams))
+
+
+def deletions(token):
+    """The token with each single character removed."""
+    return {token[:i] + token[i + 1:] for i in range(len(token))}
+
+
+def score_names(query, candidates):
+    """Trigram cosine similarity of one name against a list of names, as an array."""
+    matcher = NameMatcher(threshold=0.0)
+    for candidate in candidates:
+        matcher.add(candidate)
+    return matcher.scores(canonical_name(query), np.arange(len(candidates), dtype=np.int64))
+
+
+def clear_winner(scores, threshold=DEFAULT_THRESHOLD, margin=MIN_MARGIN):
+    """Position of the top score if it reaches `threshold` and beats the runner-up by `margin`, else None."""
+    if len(scores) == 0:
+        return None
+    order = np.argsort(-scores)[:2]
+    if scores[order[0]] < threshold:
+        return None
+    if len(order) > 1 and scores[order[0]] - scores[order[1]] < margin:
+        return None
+    return int(order[0])
+
+
+def best_match(query, names, threshold=DEFAULT_THRESHOLD, margin=MIN_MARGIN):
+    """(index, score) of the one name in `names` that clearly matches `query`.
+
+    The index is None when no name is a clear winner (see clear_winner);
+    the score is the best one either way.
+    """
+    if not names:
+        return None, 0.0
+    scores = score_names(query, names)
+    return clear_winner(scores, threshold, margin), float(scores.max())
+
+
+class NameMatcher:
+    """Match company names against a large list of names without comparing every pair.
+
+    Names are compared in canonical form (see canonical_name). Identical
+    canonical names are found with a dict lookup. Anything else is first
+    narrowed by an inverted index over the rarest tokens of the name's
+    distinctive part (legal suffixes are never used for blocking, and tokens
+    in more than `max_df` names only when nothing rarer is available). A
+    query token that is not indexed is matched to indexed tokens one edit
+    away. Only the candidates are scored, all at once with numpy, by cosine
+    similarity of their character-trigram sets.
+    """
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD, max_df=2000, block_tokens=2):
+        self.threshold = threshold
+        self.max_df = max_df
+        self.block_tokens = block_tokens
+        self.names = []
+        self.payloads = []
+        self.exact = {}
+        self.postings = {}
+        self.blocks = None
+        self.variants = None
+        self.suffixes = []
+        self.gram_chunks = []
+        self.gram_indices = None
+        self.gram_indptr = None
+        self.gram_counts = None
+
+    def __len__(self):
+        return len(self.names)
+
+    def add(self, name, payload=None):
+        """Index a name; `payload` (default: the name) is what matches return."""
+        canonical = canonical_name(name)
+        index = len(self.names)
+        self.names.append(name)
+        self.payloads.append(name if payload is None else payload)
+        self.exact.setdefault(canonical, []).append(index)
+        core, suffix = split_legal_suffix(canonical)
+        for token in set(core.split()):
+            self.postings.setdefault(token, []).append(index)
+        self.suffixes.append(suffix)
+        self.gram_chunks.append(name_grams(core))
+        self.gram_indices = None
+        self.blocks = None
+
+    def add_many(self, names, payloads=None):
+        for i, name in enumerate(names):
+            self.add(name, None if payloads is None else payloads[i])
+
+    def _finalize(self):
+        # Pack every name's trigrams into one CSR-style array for vectorized gathers
+        if self.gram_indices is not None and self.blocks is not None:
+            return
+        counts = np.fromiter((len(chunk) for chunk in self.gram_chunks), dtype=np.int64, count=len(self.gram_chunks))
+        self.gram_counts = counts
+        self.suffix_array = np.array(self.suffixes, dtype=object)
+        self.gram_indptr = np.concatenate(([0], np.cumsum(counts)))
+        self.gram_indices = np.concatenate(self.gram_chunks) if self.gram_chunks else np.empty(0, dtype=np.int64)
+        self.blocks = {token: np.asarray(ids, dtype=np.int64) for token, ids in self.postings.items()}
+        # Single-deletion variants of every indexed token, so a token with one typo still finds its block
+        self.variants = {}
+        for token in self.blocks:
+            if len(token) >= MIN_VARIANT_LENGTH:
+                for variant in deletions(token):
+                    self.variants.setdefault(variant, []).append(token)
+
+    def block_tokens_for(self, token):
+        """Indexed tokens within one edit of `token` (just the token itself when it is indexed)."""
+        if token in self.blocks:
+            return [token]
+        if len(token) < MIN_VARIANT_LENGTH:
+            return []
+        found = set(self.variants.get(token, ()))
+        for variant in deletions(token):
+            if variant in self.blocks:
+                found.add(variant)
+            found.update(self.variants.get(variant, ()))
+        return list(found)
+
+    def candidates(self, canonical):
+        """Ids of indexed names sharing one of the query's rarest distinctive tokens."""
+        self._finalize()
+        core, _ = split_legal_suffix(canonical)
+        known = []
+        for token in set(core.split()):
+            matched = [self.blocks[indexed] for indexed in self.block_tokens_for(token)]
+            if matched:
+                known.append(np.unique(np.concatenate(matched)) if len(matched) > 1 else matched[0])
+        if not known:
+            return np.empty(0, dtype=np.int64)
+        known.sort(key=len)
+        rare = [ids for ids in known if len(ids) <= self.max_df][:self.block_tokens]
+        if rare:
+            return np.unique(np.concatenate(rare))
+        # A name made only of common words must share all of them
+        ids = known[0]
+        for other in known[1:]:
+            ids = np.intersect1d(ids, other, assume_unique=True)
+        return ids
+
+    def scores(self, canonical, ids):
+        """Similarity of the query to each indexed name in `ids`.
+
+        Distinctive parts are compared, so a shared 'PRIVATE LIMITED' adds
+        nothing. Names that both carry a legal form, and different ones
+        (LLP vs PRIVATE LIMITED), are different entities and score 0.
+        """
+        self._finalize()
+        if len(ids) == 0:
+            return np.empty(0)
+        core, suffix = split_legal_suffix(canonical)
+        query = name_grams(core)
+        lengths = self.gram_counts[ids]
+        total = int(lengths.sum())
+        # Positions of every candidate's trigrams in gram_indices, and which candidate owns each
+        owner = np.repeat(np.arange(len(ids)), lengths)
+        offsets = np.repeat(self.gram_indptr[ids] - np.concatenate(([0], np.cumsum(lengths)[:-1])), lengths)
+        hits = np.isin(self.gram_indices[offsets + np.arange(total)], query)
+        shared = np.bincount(owner, weights=hits, minlength=len(ids))
+        scores = shared / np.sqrt(np.maximum(lengths * len(query), 1))
+        if suffix:
+            other = self.suffix_array[ids]
+            scores[(other != suffix) & (other != '')] = 0.0
+        return scores
+
+    def match(self, name, limit=1):
+        """Best matches as (payload, name, score), highest first, at or above the threshold."""
+        canonical = canonical_name(name)
+        exact = self.exact.get(canonical)
+        if exact:
+            return [(self.payloads[i], self.names[i], 1.0) for i in exact[:limit]]
+        ids = self.candidates(canonical)
+        scores = self.scores(canonical, ids)
+        order = np.argsort(-scores)[:limit]
+        return [
+            (self.payloads[ids[i]], self.names[ids[i]], float(scores[i]))
+            for i in order if scores[i] >= self.threshold
+        ]
+
+    def best(self, name, margin=MIN_MARGIN):
+        """The one (payload, name, score) that clearly matches `name`, or None.
+
+        Like match(), but a fuzzy best that another candidate scores within
+        `margin` of is ambiguous and rejected.
+        """
+        canonical = canonical_name(name)
+        exact = self.exact.get(canonical)
+        if exact:
+            i = exact[0]
+            return self.payloads[i], self.names[i], 1.0
+        ids = self.candidates(canonical)
+        scores = self.scores(canonical, ids)
+        i = clear_winner(scores, self.threshold, margin)
+        if i is None:
+            return None
+        return self.payloads[ids[i]], self.names[ids[i]], float(scores[i])
+
+    def match_many(self, names):
+        """Best (payload, name, score) for each name, or None where nothing clearly passes the threshold."""
+        return [self.best(name) for name in names]
@@ -0,0 +1,123 @@
+import os
+import re
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as SelectolaxParser
+except ImportError:
+    SelectolaxParser = None
+
+try:
+    import lxml.html
+except ImportError:
+    lxml = None
+
+# Fastest available backend first; SCRAPER_HTML_PARSER overrides the choice
+BACKENDS = [name for name, available in (
+    ('selectolax', SelectolaxParser is not None),
+    ('lxml', lxml is not None),
+    ('html.parser', True)
+) if available]
+DEFAULT_BACKEND = os.environ.get('SCRAPER_HTML_PARSER') or BACKENDS[0]
+
+# Builder used by BeautifulSoup for documents and sliced fragments
+SOUP_FEATURES = 'lxml' if lxml is not None else 'html.parser'
+
+_SELECTOR_RE = re.compile(r'^([a-zA-Z][a-zA-Z0-9]*)?((?:[#.][\w-]+)*)$')
+
+
+class Scope:
+    """A simple `tag#id.class` selector naming the subtree a scraper needs."""
+
+    def __init__(self, selector):
+        match = _SELECTOR_RE.match(selector.strip())
+        if not selector.strip() or not match:
+            raise ValueError(f"Unsupported scope selector: {selector!r}")
+        self.selector = selector.strip()
+        self.tag = match.group(1)
+        self.id = None
+        self.classes = []
+        for part in re.findall(r'[#.][\w-]+', match.group(2)):
+            if part[0] == '#':
+                self.id = part[1:]
+            else:
+                self.classes.append(part[1:])
+
+    def xpath(self):
+        conditions = []
+        if self.id:
+            conditions.append(f'@id="{self.id}"')
+        for cls in self.classes:
+            conditions.append(f'contains(concat(" ", normalize-space(@class), " "), " {cls} ")')
+        path = f'//{self.tag or "*"}'
+        if conditions:
+            path += '[' + ' and '.join(conditions) + ']'
+        return path
+
+    def strainer(self):
+        attrs = {}
+        if self.id:
+            attrs['id'] = self.id
+        if self.classes:
+            # Match every class in any order against the raw class attribute
+            attrs['class'] = re.compile(
+                '^' + ''.join(rf'(?=.*(?:^|\s){re.escape(cls)}(?:\s|$))' for cls in self.classes)
+            )
+        return SoupStrainer(self.tag, attrs=attrs)
+
+
+def _as_scopes(scope):
+    if scope is None:
+        return []
+    if isinstance(scope, (str, Scope)):
+        scope = [scope]
+    return [s if isinstance(s, Scope) else Scope(s) for s in scope]
+
+
+def _slice_selectolax(html, scopes):
+    tree = SelectolaxParser(html)
+    fragments = []
+    for scope in scopes:
+        fragments.extend(node.html for node in tree.css(scope.selector))
+    return fragments
+
+
+def _slice_lxml(html, scopes):
+    try:
+        tree = lxml.html.document_fromstring(html)
+    except ValueError:
+        # lxml refuses str input that carries an XML encoding declaration
+        tree = lxml.html.document_fromstring(html.encode('utf-8'))
+    fragments = []
+    for scope in scopes:
+        fragments.extend(
+            lxml.html.tostring(node, encoding='unicode', with_tail=False)
+            for node in tree.xpath(scope.xpath())
+        )
+    return fragments
+
+
+def make_soup(html, scope=None, backend=None):
+    """Parse HTML into BeautifulSoup, optionally keeping only the scoped subtrees.
+
+    `scope` is a selector such as 'div#statups_data' or a list of them. The
+    selectolax and lxml backends cut the matching subtrees out with a C
+    parser and only hand those fragments to BeautifulSoup; the pure-Python
+    html.parser backend uses a SoupStrainer so the rest of the document is
+    never built into a tree.
+    """
+    backend = backend or DEFAULT_BACKEND
+    scopes = _as_scopes(scope)
+    if not scopes:
+        features = 'html.parser' if backend == 'html.parser' else SOUP_FEATURES
+        return BeautifulSoup(html, features)
+
+    if backend == 'selectolax' and SelectolaxParser is not None:
+        return BeautifulSoup(''.join(_slice_selectolax(html, scopes)), SOUP_FEATURES)
+    if backend in ('selectolax', 'lxml') and lxml is not None:
+        return BeautifulSoup(''.join(_slice_lxml(html, scopes)), SOUP_FEATURES)
+
+    if len(scopes) == 1:
+        return BeautifulSoup(html, 'html.parser', parse_only=scopes[0].strainer())
+    # A SoupStrainer can only describe one selector, so several scopes need the full tree
+    return BeautifulSoup(html, 'html.parser')
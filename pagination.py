@@ -0,0 +1,152 @@
+import logging
+import re
+from recrawl import content_hash
+
+logger = logging.getLogger(__name__)
+
+# Upper bound for the galloping search when a listing gives no pager to read
+MAX_PAGE = 100000
+
+_HREF = re.compile(r'''href\s*=\s*["']([^"']*)["']''', re.IGNORECASE)
+
+
+def pager_last_page(html, pattern):
+    """Highest page number linked from the page, or None.
+
+    `pattern` is a regex whose first group captures the page number in a
+    pager link, e.g. r'[?&]page=(\\d+)'. Only href attributes are searched,
+    so the document does not need to be parsed.
+    """
+    pattern = re.compile(pattern) if isinstance(pattern, str) else pattern
+    pages = []
+    for href in _HREF.findall(html or ''):
+        match = pattern.search(href.replace('&amp;', '&'))
+        if match:
+            pages.append(int(match.group(1)))
+    return max(pages) if pages else None
+
+
+class ListingProbe:
+    """Fetch listing pages for end-of-listing discovery, within the host's budget.
+
+    `fetch_listing(page)` returns (html, rows) for one page, so the same
+    fetch gives discovery both the pager markup and the content to compare.
+    Every probe waits for a slot in `budget` (a rate_limiter.HostBudget),
+    like a crawled page would. The rows fetched are kept in `rows`, so a
+    crawl can hand them to PageCrawler.run(prefetched=...) instead of
+    fetching those pages again.
+    """
+
+    def __init__(self, fetch_listing, budget=None):
+        self.fetch_listing = fetch_listing
+        self.budget = budget
+        self.rows = {}
+        self.hashes = {}
+
+    def __len__(self):
+        return len(self.hashes)
+
+    def load(self, page):
+        """Fetch a page, record its rows and content hash, and return its HTML."""
+        if self.budget is not None:
+            self.budget.acquire_blocking()
+        html, rows = self.fetch_listing(page)
+        self.rows[page] = rows
+        self.hashes[page] = content_hash(rows) if rows else None
+        return html
+
+    def digest(self, page):
+        """Content hash of a page, or None if it has no rows."""
+        if page not in self.hashes:
+            self.load(page)
+        return self.hashes[page]
+
+
+def find_last_page(probe, first_page=1, max_page=MAX_PAGE):
+    """Last page of a listing, found with O(log n) fetches; None if `first_page` is empty.
+
+    `probe` is a ListingProbe; a page without rows means the listing has
+    ended. Probes gallop forward
+    (first+1, +2, +4, ...) until one is past the end, then bisect. Sites
+    that clamp out-of-range pages to the last one are handled too: two
+    probes with the same content are both at or past the end, and the
+    search looks for the first page showing that content instead.
+    """
+    if probe.digest(first_page) is None:
+        return None
+    previous, low, step = None, first_page, 1
+    while True:
+        page = min(low + step, max_page)
+        if page == low:
+            return low
+        digest = probe.digest(page)
+        if digest is None:
+            # The end lies in [low, page): the largest page that still has rows
+            while page - low > 1:
+                middle = (low + page) // 2
+                if probe.digest(middle) is None:
+                    page = middle
+                else:
+                    low = middle
+            logger.info(f"Found last page {low} in {len(probe)} fetches")
+            return low
+        if digest == probe.digest(low):
+            # Both show the clamped last page: the end is the first page in (previous, low] showing it
+            high = low
+            low = first_page - 1 if previous is None else previous
+            while high - low > 1:
+                middle = (low + high) // 2
+                if probe.digest(middle) == digest:
+                    high = middle
+                else:
+                    low = middle
+            logger.info(f"Found last page {high} (clamped listing) in {len(probe)} fetches")
+            return high
+        previous, low, step = low, page, step * 2
+
+
+def discover_last_page(first_page, pattern=None, html=None, probe=None, max_page=MAX_PAGE):
+    """Read the last page from pager markup, falling back to a binary search with `probe`.
+
+    Without `html` the pager is read from `first_page` as fetched by the
+    probe, so that page is paced and its rows reused like any other probe.
+    A pager may only show a window of pages, so its last page is trusted
+    only once the page after it turns out empty (or a clamped copy of it).
+    """
+    if html is None and pattern is not None and probe is not None:
+        html = probe.load(first_page)
+    if html is not None and pattern is not None:
+        last_page = pager_last_page(html, pattern)
+        if last_page is not None and last_page >= first_page:
+            if probe is None:
+                return last_page
+            after = probe.digest(last_page + 1)
+            if after is None or after == probe.digest(last_page):
+                logger.info(f"Pager lists {last_page} as the last page")
+                return last_page
+            logger.info(f"Page {last_page + 1} still has rows, so the pager is windowed; searching on from there")
+            return find_last_page(probe, last_page + 1, max_page)
+    if probe is not None:
+        return find_last_page(probe, first_page, max_page)
+    return None
+
+
+class RepeatGuard:
+    """Notice when a listing starts repeating itself.
+
+    Many listings answer a page past the end with the last page again (or
+    the first one) rather than an empty page. Feed each page's rows in
+    order; `is_repeat` is True once a page hashes the same as the page
+    before it, or has no rows at all, so the crawl can stop right there.
+    """
+
+    def __init__(self):
+        self.previous = None
+
+    def is_repeat(self, rows):
+        if not rows:
+            return True
+        digest = content_hash(rows)
+        repeated = digest == self.previous
+        self.previous = digest
+        return repeated
@@ -0,0 +1,140 @@
+import asyncio
+import logging
+from rate_limiter import TokenBucket, get_budget
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+
+class Stage:
+    """One step of a Pipeline: a blocking `func(item)` run in worker threads.
+
+    `func` returns the item to pass on (None drops it), or with expand=True an
+    iterable of items. Items for which `accepts(item)` is false skip the stage
+    untouched and use none of its workers or rate budget. With `host` the
+    stage draws from that host's shared budget, so stages hitting the same
+    site stay within one politeness limit; with only `rate` it gets its own.
+    """
+
+    def __init__(self, name, func, workers=1, rate=None, burst=1, host=None,
+                 accepts=None, expand=False, queue_size=100):
+        self.name = name
+        self.func = func
+        self.workers = max(1, int(workers))
+        if host:
+            self.bucket = get_budget(host, rate=rate or 1.0, burst=burst).bucket
+        elif rate:
+            self.bucket = TokenBucket(rate, burst)
+        else:
+            self.bucket = None
+        self.accepts = accepts
+        self.expand = expand
+        self.queue_size = queue_size
+        self.processed = 0
+        self.skipped = 0
+        self.failed = 0
+
+
+class Pipeline:
+    """Run items through stages connected by bounded queues.
+
+    Every stage works as soon as its input queue has something in it, so the
+    first company found by discovery is being enriched while discovery is
+    still running. A full queue blocks the stage before it, which keeps
+    memory flat when a later stage is slower. `sink(item)` is called on the
+    event loop for each item leaving the last stage, in completion order.
+    """
+
+    def __init__(self, stages, sink=None):
+        self.stages = list(stages)
+        self.sink = sink
+
+    async def run_async(self, items):
+        queues = [asyncio.Queue(maxsize=stage.queue_size) for stage in self.stages]
+        output = asyncio.Queue(maxsize=self.stages[-1].queue_size if self.stages else 0)
+        queues.append(output)
+
+        async def feed():
+            for item in items:
+                await queues[0].put(item)
+
+        async def work(index, stage):
+            inbox, outbox = queues[index], queues[index + 1]
+            while True:
+                item = await inbox.get()
+                if item is _DONE:
+                    return
+                # Anything an item does to the stage fails that item only, never the worker
+                try:
+                    if stage.accepts is not None and not stage.accepts(item):
+                        stage.skipped += 1
+                        outputs = [item]
+                    else:
+                        if stage.bucket is not None:
+                            await stage.bucket.acquire()
+                        result = await asyncio.to_thread(stage.func, item)
+                        if result is None:
+                            outputs = []
+                        else:
+                            outputs = list(result) if stage.expand else [result]
+                        stage.processed += 1
+                except Exception as e:
+                    stage.failed += 1
+                    logger.error(f"Stage {stage.name} failed on {item!r}: {str(e)}")
+                    continue
+                for out in outputs:
+                    await outbox.put(out)
+
+        async def run_stage(index, stage, upstream):
+            # Workers start at once; the stage is closed only after everything upstream is done
+            workers = [asyncio.create_task(work(index, stage)) for _ in range(stage.workers)]
+            try:
+                await upstream
+                for _ in workers:
+                    await queues[index].put(_DONE)
+                await asyncio.gather(*workers)
+            finally:
+                for worker in workers:
+                    worker.cancel()
+
+        async def drain():
+            count = 0
+            while True:
+                item = await output.get()
+                if item is _DONE:
+                    return count
+                count += 1
+                if self.sink is not None:
+                    self.sink(item)
+
+        async def close_output(upstream):
+            await upstream
+            await output.put(_DONE)
+
+        tasks = [asyncio.create_task(feed())]
+        for index, stage in enumerate(self.stages):
+            tasks.append(asyncio.create_task(run_stage(index, stage, tasks[-1])))
+        tasks.append(asyncio.create_task(close_output(tasks[-1])))
+        drainer = asyncio.create_task(drain())
+        tasks.append(drainer)
+        try:
+            # A failure anywhere (the input, a stage, the sink) would leave the rest waiting on
+            # an end marker that never comes, so it ends the whole run
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+            for task in done:
+                if task.exception() is not None:
+                    raise task.exception()
+            count = drainer.result()
+        finally:
+            # Only does anything if something failed or the run was cancelled
+            for task in tasks:
+                task.cancel()
+        for stage in self.stages:
+            logger.info(f"Stage {stage.name}: {stage.processed} processed, "
+                        f"{stage.skipped} passed through, {stage.failed} failed")
+        return count
+
+    def run(self, items):
+        """Blocking entry point; returns the number of items that reached the sink."""
+        return asyncio.run(self.run_async(items))
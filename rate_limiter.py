@@ -0,0 +1,132 @@
+import asyncio
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+class TokenBucket:
+    """Token bucket that hands out send slots by reservation.
+
+    Each caller reserves a token under a lock and is told how long to wait
+    for it, so concurrent callers are spaced out at exactly `rate` per second
+    instead of all sleeping the same amount and then bursting.
+    """
+
+    def __init__(self, rate, burst=1):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.capacity = max(1, int(burst))
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Take one token and return the delay in seconds before it may be used."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    async def acquire(self):
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def acquire_blocking(self):
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+
+class LeakyBucket:
+    """Leaky bucket: send slots exactly 1/rate apart, with no bursts.
+
+    Like TokenBucket it works by reservation, so callers only wait for their
+    own slot and never hold a worker or browser while queued behind others.
+    """
+
+    def __init__(self, rate):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.interval = 1.0 / self.rate
+        self.next_slot = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Claim the next send slot and return the delay in seconds until it."""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+            return slot - now
+
+    async def acquire(self):
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def acquire_blocking(self):
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+
+class HostBudget:
+    """Politeness budget for one host: `rate` requests/s with `max_in_flight` concurrent.
+
+    kind='token' allows bursts of up to `burst` requests; kind='leaky' spaces
+    every request evenly.
+    """
+
+    def __init__(self, rate, burst=1, max_in_flight=1, kind='token'):
+        if kind == 'leaky':
+            self.bucket = LeakyBucket(rate)
+        elif kind == 'token':
+            self.bucket = TokenBucket(rate, burst)
+        else:
+            raise ValueError(f"Unknown rate limiter kind: {kind!r}")
+        self.max_in_flight = max(1, int(max_in_flight))
+
+    async def acquire(self):
+        await self.bucket.acquire()
+
+    def acquire_blocking(self):
+        self.bucket.acquire_blocking()
+
+
+_budgets = {}
+_budgets_lock = threading.Lock()
+
+
+def host_of(url):
+    return urlsplit(url).netloc.lower()
+
+
+def get_budget(host, rate=1.0, burst=1, max_in_flight=1, kind='token'):
+    """Return the shared budget for a host, creating it with the given limits on first use."""
+    host = host.lower()
+    with _budgets_lock:
+        budget = _budgets.get(host)
+        if budget is None:
+            budget = HostBudget(rate, burst, max_in_flight, kind)
+            _budgets[host] = budget
+        return budget
+
+
+def configure_host(host, rate, burst=1, max_in_flight=1, kind='token'):
+    """Set (or replace) the budget for a host before any scraper asks for it."""
+    with _budgets_lock:
+        budget = HostBudget(rate, burst, max_in_flight, kind)
+        _budgets[host.lower()] = budget
+        return budget
+
+
+async def acquire(url):
+    """Wait for a send slot for the URL's host, using its configured budget."""
+    await get_budget(host_of(url)).acquire()
@@ -0,0 +1,131 @@
+import hashlib
+import json
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+DAY = 24 * 3600
+
+# Revisit intervals adapt between these bounds: halved when content changed, grown when it did not
+MIN_INTERVAL = DAY
+MAX_INTERVAL = 60 * DAY
+INITIAL_INTERVAL = 7 * DAY
+GROWTH = 1.5
+SHRINK = 0.5
+
+
+def content_hash(content):
+    """Stable hash of page content: bytes, text, or parsed rows/dicts (hashed as sorted JSON)."""
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    elif not isinstance(content, bytes):
+        content = json.dumps(content, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha256(content).hexdigest()
+
+
+class RecrawlScheduler:
+    """Decide which pages or companies are due for a revisit.
+
+    Each key keeps the hash of what was extracted last time, when it was
+    last checked and its current revisit interval. A check that finds the
+    same hash grows the interval; a change shrinks it. Keys that never
+    change drift towards MAX_INTERVAL and keys that change often stay near
+    MIN_INTERVAL. A refresh run therefore only fetches what is due. The
+    table lives in the StateStore database and shares its transactions.
+    """
+
+    def __init__(self, state, namespace, min_interval=MIN_INTERVAL, max_interval=MAX_INTERVAL,
+                 initial_interval=INITIAL_INTERVAL):
+        self.state = state
+        self.namespace = namespace
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.initial_interval = initial_interval
+        with self.state.lock:
+            self.state.db.execute("""
+                CREATE TABLE IF NOT EXISTS freshness (
+                    namespace TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    last_checked REAL NOT NULL,
+                    last_changed REAL NOT NULL,
+                    interval REAL NOT NULL,
+                    checks INTEGER NOT NULL DEFAULT 1,
+                    changes INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (namespace, key)
+                )
+            """)
+
+    def due(self, keys, now=None):
+        """The keys that are due (or never seen), most overdue first, unseen keys last in input order."""
+        now = time.time() if now is None else now
+        with self.state.lock:
+            rows = self.state.db.execute(
+                "SELECT key, last_checked + interval FROM freshness WHERE namespace = ?", (self.namespace,)
+            ).fetchall()
+        next_due = dict(rows)
+        overdue = []
+        unseen = []
+        for key in keys:
+            when = next_due.get(str(key))
+            if when is None:
+                unseen.append(key)
+            elif when <= now:
+                overdue.append((when, key))
+        overdue.sort(key=lambda item: item[0])
+        return [key for _, key in overdue] + unseen
+
+    def has_changed(self, key, content, default=True):
+        """True if `content` differs from what was last recorded for `key`; `default` if nothing was."""
+        with self.state.lock:
+            row = self.state.db.execute(
+                "SELECT content_hash FROM freshness WHERE namespace = ? AND key = ?", (self.namespace, str(key))
+            ).fetchone()
+        return default if row is None else row[0] != content_hash(content)
+
+    def record(self, key, content, now=None):
+        """Store the hash of what was just extracted for `key`; returns True if it changed."""
+        return self.record_many([(key, content)], now)[0]
+
+    def record_many(self, items, now=None):
+        """Record several (key, content) pairs in one transaction; returns a changed flag for each."""
+        now = time.time() if now is None else now
+        changed = []
+        with self.state.batch():
+            for key, content in items:
+                key = str(key)
+                digest = content_hash(content)
+                row = self.state.db.execute(
+                    "SELECT content_hash, interval FROM freshness WHERE namespace = ? AND key = ?",
+                    (self.namespace, key)
+                ).fetchone()
+                if row is None:
+                    self.state.db.execute(
+                        "INSERT INTO freshness (namespace, key, content_hash, last_checked, last_changed, interval) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        (self.namespace, key, digest, now, now, self.initial_interval)
+                    )
+                    changed.append(True)
+                    continue
+                previous, interval = row
+                is_changed = previous != digest
+                factor = SHRINK if is_changed else GROWTH
+                interval = min(self.max_interval, max(self.min_interval, interval * factor))
+                self.state.db.execute(
+                    "UPDATE freshness SET content_hash = ?, last_checked = ?, interval = ?, checks = checks + 1, "
+                    "changes = changes + ?, last_changed = CASE WHEN ? THEN ? ELSE last_changed END "
+                    "WHERE namespace = ? AND key = ?",
+                    (digest, now, interval, int(is_changed), int(is_changed), now, self.namespace, key)
+                )
+                changed.append(is_changed)
+        return changed
+
+    def stats(self):
+        """Keys tracked, and how many are due right now."""
+        with self.state.lock:
+            total, due = self.state.db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(last_checked + interval <= ?), 0) FROM freshness WHERE namespace = ?",
+                (time.time(), self.namespace)
+            ).fetchone()
+        return total, due
@@ -0,0 +1,37 @@
+import csv
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+def iter_html_files(directory, suffix='.html'):
+    """Yield saved HTML files under a directory in a stable order."""
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for name in sorted(files):
+            if name.endswith(suffix):
+                yield os.path.join(root, name)
+
+
+def reparse(jobs, parse_job, output_file, fieldnames, workers=None, chunksize=32):
+    """Run `parse_job` over `jobs` in a process pool and write the rows to CSV.
+
+    `parse_job` must be a module-level function (so it can be pickled) that
+    takes one job and returns a row dict, or None to skip it. Rows are
+    written in job order.
+    """
+    jobs = list(jobs)
+    logger.info(f"Re-parsing {len(jobs)} saved pages into {output_file}")
+    written = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool, \
+            open(output_file, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
+        writer.writeheader()
+        for row in pool.map(parse_job, jobs, chunksize=chunksize):
+            if row is not None:
+                writer.writerow(row)
+                written += 1
+    logger.info(f"Wrote {written} rows to {output_file}")
+    return written
@@ -0,0 +1,110 @@
+import csv
+import logging
+import os
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+
+# Rows per Parquet part file; each part is one row group, written and closed in one go
+PARQUET_ROWS_PER_PART = 50000
+
+
+class StreamingSink:
+    """Append-only CSV writer that only ever writes new rows.
+
+    Rows are buffered and written `batch_size` at a time; `checkpoint()`
+    flushes and fsyncs so a crash never loses rows that a session file
+    already claims were saved. With `parquet_dir` rows are also collected
+    into Parquet part files of `parquet_rows` rows (needs pyarrow). A part
+    is written to a temporary name, closed and then renamed, so every
+    part on disk is complete. The CSV is the durable record: rows still
+    waiting for a full part are written at close() and lost on a crash.
+    """
+
+    def __init__(self, path, fieldnames, batch_size=100, append=True, parquet_dir=None,
+                 parquet_rows=PARQUET_ROWS_PER_PART):
+        self.path = path
+        self.fieldnames = list(fieldnames)
+        self.batch_size = batch_size
+        self.buffer = []
+        self.rows_written = 0
+
+        write_header = not append or not os.path.exists(path) or os.path.getsize(path) == 0
+        self.file = open(path, 'a' if append else 'w', newline='', encoding='utf-8')
+        self.writer = csv.DictWriter(self.file, fieldnames=self.fieldnames, extrasaction='ignore')
+        if write_header:
+            self.writer.writeheader()
+
+        self.parquet_dir = None
+        self.parquet_rows = parquet_rows
+        self.parquet_buffer = []
+        self.parquet_parts = []
+        if parquet_dir:
+            if pa is None:
+                logger.warning("pyarrow is not installed; skipping Parquet output")
+            else:
+                os.makedirs(parquet_dir, exist_ok=True)
+                self.parquet_dir = parquet_dir
+                self.parquet_prefix = f'part-{datetime.now().strftime("%Y%m%d_%H%M%S")}'
+                self.parquet_schema = pa.schema([(name, pa.string()) for name in self.fieldnames])
+
+    def write(self, row):
+        self.buffer.append(row)
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def write_rows(self, rows):
+        for row in rows:
+            self.write(row)
+
+    def flush(self):
+        """Write buffered rows to the OS (not necessarily to disk)."""
+        if self.buffer:
+            self.writer.writerows(self.buffer)
+            if self.parquet_dir is not None:
+                self.parquet_buffer.extend(self.buffer)
+                while len(self.parquet_buffer) >= self.parquet_rows:
+                    self.write_parquet_part(self.parquet_buffer[:self.parquet_rows])
+                    self.parquet_buffer = self.parquet_buffer[self.parquet_rows:]
+            self.rows_written += len(self.buffer)
+            self.buffer = []
+        self.file.flush()
+
+    def write_parquet_part(self, rows):
+        """Write rows as one complete Parquet file (a single row group)."""
+        columns = {
+            name: [None if row.get(name) is None else str(row.get(name)) for row in rows]
+            for name in self.fieldnames
+        }
+        path = os.path.join(self.parquet_dir, f'{self.parquet_prefix}-{len(self.parquet_parts):05d}.parquet')
+        pq.write_table(pa.table(columns, schema=self.parquet_schema), path + '.tmp')
+        os.replace(path + '.tmp', path)
+        self.parquet_parts.append(path)
+
+    def checkpoint(self):
+        """Flush and fsync so everything written so far survives a crash."""
+        self.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self):
+        if self.file.closed:
+            return
+        self.checkpoint()
+        self.file.close()
+        if self.parquet_buffer:
+            self.write_parquet_part(self.parquet_buffer)
+            self.parquet_buffer = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
@@ -0,0 +1,51 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+
+class SQLiteStore:
+    """One SQLite connection in WAL mode, shared by every thread behind an RLock.
+
+    Base of the crawl state and company stores. Updates made inside
+    `batch()` (which nests) are committed as one transaction; a statement
+    run outside a batch is its own transaction.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.RLock()
+        self.depth = 0
+        self.db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+
+    @contextmanager
+    def batch(self):
+        """Group every update inside the block into one atomic transaction."""
+        with self.lock:
+            if self.depth == 0:
+                self.db.execute("BEGIN IMMEDIATE")
+            self.depth += 1
+            try:
+                yield self
+            except BaseException:
+                self.depth -= 1
+                if self.depth == 0:
+                    self.db.execute("ROLLBACK")
+                raise
+            else:
+                self.depth -= 1
+                if self.depth == 0:
+                    self.db.execute("COMMIT")
+
+    def _execute(self, sql, params=()):
+        with self.batch():
+            return self.db.execute(sql, params)
+
+    def _executemany(self, sql, rows):
+        with self.batch():
+            self.db.executemany(sql, rows)
+
+    def close(self):
+        with self.lock:
+            self.db.close()
@@ -1,63 +1,95 @@
-import requests
-from bs4 import BeautifulSoup
 import csv
-import time
+from http_fetcher import fetch
+from crawler import PageCrawler
+from page_parser import make_soup
+from pagination import discover_last_page, ListingProbe, RepeatGuard
+from rate_limiter import get_budget
 
-def scrape_companies():
-    base_url = "https://www.startinup.up.gov.in/crm/welcome/connect_network/"
+HOST = 'www.startinup.up.gov.in'
+BASE_URL = "https://www.startinup.up.gov.in/crm/welcome/connect_network/"
+# End of the range crawled before the end was discovered; used when discovery fails
+DEFAULT_END_PAGE = 90
+# Pager links end with the page number, like the listing URLs themselves
+PAGER_PATTERN = r'connect_network/(\d+)'
+
+# Add headers to mimic a browser request
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+def fetch_listing(page):
+    """Fetch one listing page; returns (html, startup rows)."""
+    print(f"Scraping page {page}...")
+    url = f"{BASE_URL}{page}"
+
+    response = fetch(url, headers=HEADERS)
+    response.raise_for_status()  # Raise exception for bad status codes
+
+    soup = make_soup(response.text, scope='div#statups_data')
+
+    rows = []
+    # Find all startup cards
+    startup_section = soup.find('div', id='statups_data')
+    if startup_section:
+        cards = startup_section.find_all('div', class_='col-md-4')
+
+        for card in cards:
+            try:
+                # Extract company details
+                company_name = card.find('h3').text.strip()
+                location = card.find('p').text.strip()
+                industry = card.find('div', class_='discription').find('p').text.strip()
+                company_url = card.find('a')['href']
+
+                rows.append([company_name, location, industry, company_url])
+            except Exception as e:
+                print(f"Error processing card: {e}")
+                continue
+    return response.text, rows
+
+def fetch_page(page):
+    """Fetch one listing page and return its startup rows."""
+    return fetch_listing(page)[1]
+
+def find_end_page(start_page, probe):
+    """One past the last listing page, from the pager or else a binary search."""
+    try:
+        # The pager is read from the start page as the probe fetches it, so the crawl reuses it
+        last_page = discover_last_page(start_page, PAGER_PATTERN, probe=probe)
+    except Exception as e:
+        print(f"Could not find the last page ({e}), stopping at page {DEFAULT_END_PAGE - 1}")
+        return DEFAULT_END_PAGE
+    return start_page if last_page is None else last_page + 1
+
+def scrape_companies(start_page=70, end_page=None, rate=1.0, max_in_flight=4):
     output_file = "startinup_companies.csv"
-    
+    # Discovery probes share the crawl's budget, and the pages they fetch are not fetched again
+    probe = ListingProbe(fetch_listing, get_budget(HOST, rate=rate, max_in_flight=max_in_flight))
+    if end_page is None:
+        end_page = find_end_page(start_page, probe)
+        print(f"Listing ends at page {end_page - 1}")
+    guard = RepeatGuard()
+
     # Create CSV file with headers
     with open(output_file, 'w', newline='', encoding='utf-8') as csvfile:
         writer = csv.writer(csvfile)
         writer.writerow(['Company Name', 'Location', 'Industry', 'URL'])
-    
-    # Loop through pages 1 to 70
-    for page in range(70,90 ):
-        print(f"Scraping page {page}...")
-        url = f"{base_url}{page}"
-        
-        try:
-            # Add headers to mimic a browser request
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
-            
-            response = requests.get(url, headers=headers)
-            response.raise_for_status()  # Raise exception for bad status codes
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            
-            # Find all startup cards
-            startup_section = soup.find('div', id='statups_data')
-            if startup_section:
-                cards = startup_section.find_all('div', class_='col-md-4')
-                
-                # Append new data to CSV
-                with open(output_file, 'a', newline='', encoding='utf-8') as csvfile:
-                    writer = csv.writer(csvfile)
-                    
-                    for card in cards:
-                        try:
-                            # Extract company details
-                            company_name = card.find('h3').text.strip()
-                            location = card.find('p').text.strip()
-                            industry = card.find('div', class_='discription').find('p').text.strip()
-                            company_url = card.find('a')['href']
-                            
-                            # Write to CSV
-                            writer.writerow([company_name, location, industry, company_url])
-                        except Exception as e:
-                            print(f"Error processing card: {e}")
-                            continue
-            
-            # Add a small delay to be polite to the server
-            time.sleep(1)
-            
-        except requests.RequestException as e:
-            print(f"Error fetching page {page}: {e}")
-            continue
-    
+
+        def handle_page(page, rows, error):
+            # Pages arrive in order, so the CSV keeps the listing order
+            if error is not None:
+                print(f"Error fetching page {page}: {error}")
+                return
+            if guard.is_repeat(rows):
+                print(f"Page {page} is empty or repeats the previous page, stopping")
+                return False
+            writer.writerows(rows)
+
+        # Keep up to max_in_flight requests open, at most `rate` per second
+        crawler = PageCrawler(HOST, fetch_page, handle_page,
+                              rate=rate, max_in_flight=max_in_flight)
+        crawler.run(range(start_page, end_page), prefetched=probe.rows)
+
     print(f"\nScraping complete! Data saved to {output_file}")
 
 if __name__ == "__main__":
@@ -1,13 +1,42 @@
-import undetected_chromedriver as uc
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+import argparse
+import copy
+import json
 import time
-import pandas as pd
 import random
 import logging
-from datetime import datetime
+from http_fetcher import Fetcher
+from pagination import pager_last_page, RepeatGuard
+from rate_limiter import get_budget, host_of
+from result_sink import StreamingSink
+from state_store import StateStore
+
+# Pages are 0-based in the search URL; the pager links carry the same parameter
+PAGER_PATTERN = r'[?&]page=(\d+)'
+
+# JSON search backend called by the search page's own scripts
+SEARCH_API_URL = 'https://api.startupindia.gov.in/sih/api/noauth/search/profiles'
+SEARCH_PAYLOAD = {
+    'query': '',
+    'focusSector': False,
+    'industries': [],
+    'sectors': [],
+    'states': [],
+    'cities': [],
+    'stages': [],
+    'badges': [],
+    'roles': ['Startup'],
+    'sort': {'orders': [{'field': 'registeredOn', 'direction': 'DESC'}]},
+}
+# The browser page shows 9 cards; the backend accepts much larger pages
+DEFAULT_PAGE_SIZE = 100
+API_RATE = 1.0
+
+# Page numbers differ between the modes (page sizes differ), so each keeps its own output and checkpoint
+OUTPUT_FILES = {
+    'api': 'startup_india_companies.csv',
+    'browser': 'startup_india_companies_browser.csv',
+}
+STATE_NAMESPACE = 'startup_india_{mode}'
 
 # Set up logging
 logging.basicConfig(
@@ -19,7 +48,129 @@ logging.basicConfig(
     ]
 )
 
+class StartupIndiaApi:
+    """Page through the Startup India search backend over plain HTTP.
+
+    Each page is one POST of `payload` with the page number and page size
+    filled in; the response is the same JSON the search page renders its
+    cards from. Endpoint, payload and field names are parameters so the
+    client can be pointed at startup_india_stub.py or follow backend
+    changes without code edits. Requests share the host's rate budget.
+    """
+
+    def __init__(self, endpoint=SEARCH_API_URL, page_size=DEFAULT_PAGE_SIZE, payload=None, rate=API_RATE,
+                 page_field='page', size_field='size', results_field='content', name_field='name',
+                 total_pages_field='totalPages', fetcher=None):
+        self.endpoint = endpoint
+        self.page_size = page_size
+        self.payload = SEARCH_PAYLOAD if payload is None else payload
+        self.page_field = page_field
+        self.size_field = size_field
+        self.results_field = results_field
+        self.name_field = name_field
+        self.total_pages_field = total_pages_field
+        self.budget = get_budget(host_of(endpoint), rate=rate)
+        self.fetcher = fetcher or Fetcher(pool_connections=1, pool_maxsize=1,
+                                          headers={'Accept': 'application/json'})
+        self.total_pages = None
+
+    def build_payload(self, page):
+        payload = copy.deepcopy(self.payload)
+        payload[self.page_field] = page
+        payload[self.size_field] = self.page_size
+        return payload
+
+    def fetch_page(self, page):
+        """Company names on one result page; also records the total page count when given."""
+        self.budget.acquire_blocking()
+        response = self.fetcher.post(self.endpoint, json=self.build_payload(page))
+        response.raise_for_status()
+        data = response.json()
+        if isinstance(data, dict):
+            total_pages = data.get(self.total_pages_field)
+            if total_pages is not None:
+                self.total_pages = int(total_pages)
+            results = data.get(self.results_field) or []
+        else:
+            results = data
+        names = (str(item.get(self.name_field) or '').strip() for item in results)
+        return [name for name in names if name]
+
+    def iter_pages(self, start_page=0):
+        """Yield (page, names) until a page is empty, repeats, or the total page count is reached."""
+        guard = RepeatGuard()
+        page = start_page
+        while self.total_pages is None or page < self.total_pages:
+            names = self.fetch_page(page)
+            if guard.is_repeat(names):
+                logging.info(f"Page {page + 1} is empty or repeats the previous page, stopping")
+                break
+            yield page, names
+            page += 1
+
+    def close(self):
+        self.fetcher.close()
+
+
+class PageCheckpoint:
+    """Append each finished page to the output CSV and remember where to resume.
+
+    Rows are fsynced before `next_page` moves past their page, so a crash
+    loses at most the page in progress and a restart neither skips nor
+    repeats a page. Nothing but the current page is held in memory.
+    """
+
+    def __init__(self, mode, output_file=None, restart=False, state=None, parquet_dir=None):
+        self.namespace = STATE_NAMESPACE.format(mode=mode)
+        self.output_file = output_file or OUTPUT_FILES[mode]
+        self.state = state or StateStore()
+        resuming = not restart and self.state.has_namespace(self.namespace)
+        if restart:
+            self.state.set_meta(self.namespace, 'next_page', 0)
+        self.next_page = self.state.get_meta(self.namespace, 'next_page', 0)
+        self.sink = StreamingSink(self.output_file, ['Company Name'], append=resuming, parquet_dir=parquet_dir)
+        if resuming:
+            logging.info(f"Resuming at page {self.next_page + 1} ({self.output_file})")
+
+    def get(self, name, default=None):
+        return self.state.get_meta(self.namespace, name, default)
+
+    def set(self, name, value):
+        self.state.set_meta(self.namespace, name, value)
+
+    def save_page(self, page, names):
+        self.sink.write_rows({'Company Name': name} for name in names)
+        self.sink.checkpoint()
+        self.next_page = page + 1
+        self.set('next_page', self.next_page)
+
+    def close(self):
+        self.sink.close()
+        self.state.close()
+
+
+def scrape_startup_india_api(checkpoint, api=None):
+    """Stream every company name from the search backend to the checkpointed CSV; returns the count."""
+    api = api or StartupIndiaApi()
+    # A resumed run must keep the page size its page numbers were counted in
+    page_size = checkpoint.get('page_size')
+    if page_size is not None and page_size != api.page_size and checkpoint.next_page:
+        logging.warning(f"Resuming with the checkpointed page size {page_size} instead of {api.page_size}")
+        api.page_size = page_size
+    checkpoint.set('page_size', api.page_size)
+    try:
+        for page, names in api.iter_pages(checkpoint.next_page):
+            checkpoint.save_page(page, names)
+            total = f"/{api.total_pages}" if api.total_pages else ''
+            logging.info(f"Page {page + 1}{total}: {len(names)} companies ({checkpoint.sink.rows_written} this run)")
+    finally:
+        api.close()
+    return checkpoint.sink.rows_written
+
+
 def setup_driver():
+    # Selenium is only needed for the browser mode
+    import undetected_chromedriver as uc
     try:
         options = uc.ChromeOptions()
         options.add_argument('--headless=new')
@@ -45,16 +196,23 @@ def random_delay():
     """Add random delay between actions to appear more human-like"""
     time.sleep(random.uniform(2, 5))
 
-def scrape_startup_india():
+def scrape_startup_india(checkpoint):
+    """Drive a browser through the search pages, saving each page through `checkpoint`."""
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    from selenium.common.exceptions import TimeoutException, NoSuchElementException
     driver = None
-    companies = []
-    page = 0
+    page = checkpoint.next_page
+    last_page = None
+    guard = RepeatGuard()
     
     try:
         driver = setup_driver()
         logging.info("Driver setup successful")
         
-        while True:
+        # Stop at the pager's last page instead of waiting for an empty one to time out
+        while last_page is None or page <= last_page:
             url = f"https://www.startupindia.gov.in/content/sih/en/search.html?roles=Startup&page={page}#"
             logging.info(f"Accessing page {page + 1}...")
             
@@ -71,6 +229,11 @@ def scrape_startup_india():
                     logging.warning(f"No more companies found on page {page}")
                     break
                 
+                if last_page is None:
+                    last_page = pager_last_page(driver.page_source, PAGER_PATTERN)
+                    if last_page is not None:
+                        logging.info(f"Pager lists {last_page + 1} pages")
+                
                 # Extract company names
                 company_elements = driver.find_elements(By.CLASS_NAME, "company-card")
                 
@@ -78,15 +241,22 @@ def scrape_startup_india():
                     logging.info("No company elements found on page")
                     break
                 
+                page_companies = []
                 for element in company_elements:
                     try:
                         company_name = element.find_element(By.CLASS_NAME, "company-name").text
                         if company_name:
-                            companies.append(company_name)
+                            page_companies.append(company_name)
                             logging.info(f"Found company: {company_name}")
                     except NoSuchElementException:
                         continue
                 
+                # A page past the end that re-renders the previous results ends the run
+                if guard.is_repeat(page_companies):
+                    logging.info(f"Page {page + 1} repeats the previous page, stopping")
+                    break
+                checkpoint.save_page(page, page_companies)
+                
                 logging.info(f"Successfully scraped page {page + 1}")
                 page += 1
                 random_delay()
@@ -103,22 +273,33 @@ def scrape_startup_india():
             driver.quit()
             logging.info("Driver closed")
     
-    return companies
-
-def save_to_csv(companies):
-    if not companies:
-        logging.warning("No companies found to save")
-        return
-        
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f'startup_india_companies_{timestamp}.csv'
-    
-    df = pd.DataFrame(companies, columns=['Company Name'])
-    df.to_csv(filename, index=False)
-    logging.info(f"Saved {len(companies)} companies to {filename}")
+    return checkpoint.sink.rows_written
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Startup India company scraper')
+    parser.add_argument('--mode', choices=['api', 'browser'], default='api',
+                        help='call the JSON search backend directly, or drive a browser')
+    parser.add_argument('--endpoint', default=SEARCH_API_URL, help='search backend URL (e.g. a local stub)')
+    parser.add_argument('--page-size', type=int, default=DEFAULT_PAGE_SIZE)
+    parser.add_argument('--payload', default=None, help='JSON search payload; page and size are filled in')
+    parser.add_argument('--rate', type=float, default=API_RATE, help='requests per second to the backend')
+    parser.add_argument('--output', default=None, help='CSV to append to (default depends on --mode)')
+    parser.add_argument('--restart', action='store_true', help='ignore the checkpoint and start from the first page')
+    parser.add_argument('--parquet-dir', default=None, help='also write Parquet part files to this directory (needs pyarrow)')
+    args = parser.parse_args()
+
     logging.info("Starting to scrape Startup India website...")
-    companies = scrape_startup_india()
-    save_to_csv(companies)
+    checkpoint = PageCheckpoint(args.mode, args.output, restart=args.restart, parquet_dir=args.parquet_dir)
+    try:
+        if args.mode == 'api':
+            api = StartupIndiaApi(args.endpoint, page_size=args.page_size, rate=args.rate,
+                                  payload=json.loads(args.payload) if args.payload else None)
+            count = scrape_startup_india_api(checkpoint, api)
+        else:
+            count = scrape_startup_india(checkpoint)
+        logging.info(f"Saved {count} companies to {checkpoint.output_file}")
+    except KeyboardInterrupt:
+        logging.info(f"Interrupted; next run resumes at page {checkpoint.next_page + 1}")
+    finally:
+        checkpoint.close()
     logging.info("Scraping completed!")
@@ -1,50 +1,84 @@
-import requests
-from bs4 import BeautifulSoup
 import csv
-import time
+from http_fetcher import fetch
+from crawler import PageCrawler
+from page_parser import make_soup
+from pagination import discover_last_page, ListingProbe, RepeatGuard
+from rate_limiter import get_budget
 
 # Base URL for the startup list
+HOST = 'startuputtarakhand.uk.gov.in'
 BASE_URL = "https://startuputtarakhand.uk.gov.in/recognised_startups"
+PAGER_PATTERN = r'[?&]page=(\d+)'
+# Page count before the end was discovered; used when discovery fails
+DEFAULT_LAST_PAGE = 22
 
 # List to store all startup data
 data = []
+guard = RepeatGuard()
+
+# Fetch a single page; returns (html, rows), with rows None if the table is missing
+def fetch_listing(page_num):
+    url = f"{BASE_URL}?page={page_num}"
+    response = fetch(url)
+    response.raise_for_status()
+    soup = make_soup(response.text, scope='tbody#startuplist')
+
+    # Find the startup list table
+    startup_list = soup.find('tbody', id='startuplist')
+    if not startup_list:
+        return response.text, None
+
+    # Extract startup data
+    rows = []
+    for row in startup_list.find_all('tr'):
+        cells = row.find_all('td')
+        if len(cells) >= 3:  # Ensure we have at least name and email
+            startup_name = cells[1].text.strip()
+            email = cells[2].text.strip()
+            rows.append({
+                'Startup Name': startup_name,
+                'Email': email
+            })
+    return response.text, rows
 
 # Function to scrape a single page
 def scrape_page(page_num):
-    url = f"{BASE_URL}?page={page_num}"
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Find the startup list table
-        startup_list = soup.find('tbody', id='startuplist')
-        if not startup_list:
-            return False
-            
-        # Extract startup data
-        for row in startup_list.find_all('tr'):
-            cells = row.find_all('td')
-            if len(cells) >= 3:  # Ensure we have at least name and email
-                startup_name = cells[1].text.strip()
-                email = cells[2].text.strip()
-                data.append({
-                    'Startup Name': startup_name,
-                    'Email': email
-                })
-        return True
+        return fetch_listing(page_num)[1]
     except Exception as e:
         print(f"Error scraping page {page_num}: {str(e)}")
+        return None
+
+def handle_page(page_num, rows, error):
+    # Called in page order; returning False cancels the pages still in flight
+    print(f"Scraped page {page_num}...")
+    if rows is None:
+        print(f"Failed to scrape page {page_num}, stopping...")
         return False
+    if guard.is_repeat(rows):
+        print(f"Page {page_num} is empty or repeats the previous page, stopping...")
+        return False
+    data.extend(rows)
+    return True
 
-# Main scraping loop
+# Read the page count from the pager instead of assuming it; probes share the crawl's budget,
+# and the first page is read through the probe so the crawl reuses it
 print("Starting to scrape startup data...")
-for page in range(1, 23):  # Pages 1 to 22
-    print(f"Scraping page {page}...")
-    if not scrape_page(page):
-        print(f"Failed to scrape page {page}, stopping...")
-        break
-    time.sleep(1)  # Add delay to be polite to the server
+probe = ListingProbe(fetch_listing, get_budget(HOST, rate=1.0, max_in_flight=4))
+try:
+    last_page = discover_last_page(1, PAGER_PATTERN, probe=probe)
+except Exception as e:
+    print(f"Could not read the pager: {str(e)}")
+    last_page = None
+if last_page is None:
+    print(f"Could not find the last page, assuming {DEFAULT_LAST_PAGE}")
+    last_page = DEFAULT_LAST_PAGE
+print(f"Listing has {last_page} pages")
+
+# Main scraping loop: up to 4 pages in flight, 1 request/s; probed pages are not fetched again
+crawler = PageCrawler(HOST, scrape_page, handle_page,
+                      rate=1.0, max_in_flight=4)
+crawler.run(range(1, last_page + 1), prefetched=probe.rows)
 
 # Write data to CSV
 if data:
@@ -0,0 +1,89 @@
+import argparse
+import json
+import logging
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+
+class StubSearchHandler(BaseHTTPRequestHandler):
+    """Answer search POSTs the way the Startup India backend does, from generated names.
+
+    `clamp` answers pages past the end with the last page again, and
+    `total_pages=False` leaves totalPages out, like backends that only
+    signal the end with an empty or repeated page. Every requested page
+    number is appended to `requests`.
+    """
+
+    companies = []
+    clamp = False
+    total_pages = True
+    requests = None
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            payload = json.loads(self.rfile.read(length) or b'{}')
+            page = int(payload.get('page', 0))
+            size = int(payload.get('size', 9))
+        except (ValueError, TypeError):
+            self.send_error(400, 'Bad search payload')
+            return
+        self.requests.append(page)
+        pages = -(-len(self.companies) // size) if size > 0 else 0
+        if self.clamp and pages:
+            page = min(page, pages - 1)
+        content = [{'name': name, 'role': 'Startup'} for name in self.companies[page * size:(page + 1) * size]]
+        result = {
+            'content': content,
+            'number': page,
+            'size': size,
+            'totalElements': len(self.companies),
+            'last': (page + 1) * size >= len(self.companies),
+        }
+        if self.total_pages:
+            result['totalPages'] = pages
+        body = json.dumps(result).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+
+def make_server(port=8765, companies=1000, clamp=False, total_pages=True):
+    """A local stand-in for the search backend serving `companies` fake startups (port 0: any free port)."""
+    handler = type('Handler', (StubSearchHandler,), {
+        'companies': [f'Example Startup {i} Private Limited' for i in range(1, companies + 1)],
+        'clamp': clamp,
+        'total_pages': total_pages,
+        'requests': [],
+    })
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler)
+    server.requests = handler.requests
+    return server
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description='Local stand-in for the Startup India search backend')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--companies', type=int, default=1000)
+    parser.add_argument('--clamp', action='store_true', help='repeat the last page for pages past the end')
+    parser.add_argument('--no-total-pages', action='store_true', help='leave totalPages out of responses')
+    args = parser.parse_args()
+    server = make_server(args.port, args.companies, clamp=args.clamp, total_pages=not args.no_total_pages)
+    logger.info(f"Serving {args.companies} companies on http://127.0.0.1:{args.port}/search")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
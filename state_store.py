@@ -0,0 +1,120 @@
+import json
+import logging
+import time
+from sqlite_store import SQLiteStore
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STATE_DB = 'crawl_state.sqlite'
+
+PENDING = 'pending'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class StateStore(SQLiteStore):
+    """Crawl state shared by the scrapers, kept in SQLite (WAL mode).
+
+    Every unit of work (a listing page, a company search, a CIN) is a row in
+    `items` under a namespace, with its status, attempt count and last error.
+    Small scalar state such as counters lives in `meta` as JSON. Updates
+    made inside `batch()` are committed as one transaction, so a checkpoint
+    costs the same whether the run has a hundred items or a million, and a
+    crash leaves either the old or the new state, never a torn file.
+    """
+
+    def __init__(self, path=DEFAULT_STATE_DB):
+        super().__init__(path)
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS items (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )
+        """)
+        self.db.execute("CREATE INDEX IF NOT EXISTS items_status ON items(namespace, status)")
+        self.db.execute("""
+            CREATE TABLE IF NOT EXISTS meta (
+                namespace TEXT NOT NULL,
+                name TEXT NOT NULL,
+                value TEXT,
+                PRIMARY KEY (namespace, name)
+            )
+        """)
+
+    def add_pending(self, namespace, keys):
+        """Register keys as pending; keys already known keep their status."""
+        now = time.time()
+        self._executemany(
+            "INSERT OR IGNORE INTO items (namespace, key, status, updated_at) VALUES (?, ?, ?, ?)",
+            [(namespace, str(key), PENDING, now) for key in keys]
+        )
+
+    def mark(self, namespace, key, status, error=None):
+        self.mark_many(namespace, [key], status, error)
+
+    def mark_many(self, namespace, keys, status, error=None):
+        now = time.time()
+        self._executemany(
+            "INSERT INTO items (namespace, key, status, attempts, last_error, updated_at) VALUES (?, ?, ?, 1, ?, ?) "
+            "ON CONFLICT(namespace, key) DO UPDATE SET status = excluded.status, "
+            "attempts = items.attempts + 1, last_error = excluded.last_error, updated_at = excluded.updated_at",
+            [(namespace, str(key), status, error, now) for key in keys]
+        )
+
+    def mark_done(self, namespace, key):
+        self.mark(namespace, key, DONE)
+
+    def mark_failed(self, namespace, key, error=None):
+        self.mark(namespace, key, FAILED, None if error is None else str(error)[:500])
+
+    def keys_with_status(self, namespace, *statuses):
+        with self.lock:
+            placeholders = ', '.join('?' for _ in statuses)
+            rows = self.db.execute(
+                f"SELECT key FROM items WHERE namespace = ? AND status IN ({placeholders})",
+                (namespace, *statuses)
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    def item(self, namespace, key):
+        """Return the state row for a key as a dict, or None."""
+        with self.lock:
+            row = self.db.execute(
+                "SELECT status, attempts, last_error, updated_at FROM items WHERE namespace = ? AND key = ?",
+                (namespace, str(key))
+            ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(('status', 'attempts', 'last_error', 'updated_at'), row))
+
+    def counts(self, namespace):
+        with self.lock:
+            rows = self.db.execute(
+                "SELECT status, COUNT(*) FROM items WHERE namespace = ? GROUP BY status", (namespace,)
+            ).fetchall()
+        return dict(rows)
+
+    def get_meta(self, namespace, name, default=None):
+        with self.lock:
+            row = self.db.execute(
+                "SELECT value FROM meta WHERE namespace = ? AND name = ?", (namespace, name)
+            ).fetchone()
+        return default if row is None else json.loads(row[0])
+
+    def set_meta(self, namespace, name, value):
+        self._execute(
+            "INSERT OR REPLACE INTO meta (namespace, name, value) VALUES (?, ?, ?)",
+            (namespace, name, json.dumps(value))
+        )
+
+    def has_namespace(self, namespace):
+        with self.lock:
+            return bool(
+                self.db.execute("SELECT 1 FROM meta WHERE namespace = ? LIMIT 1", (namespace,)).fetchone()
+                or self.db.execute("SELECT 1 FROM items WHERE namespace = ? LIMIT 1", (namespace,)).fetchone()
+            )
@@ -0,0 +1,65 @@
+import pytest
+from bs4 import BeautifulSoup
+
+from cin_index import CinIndex
+from name_matcher import NameMatcher, best_match
+
+# Names that share words with a registry name but are different companies
+FALSE_POSITIVES = [
+    ('Sharma Traders Pvt Ltd', 'VERMA TRADERS PRIVATE LIMITED'),
+    ('Zeta Technologies Pvt Ltd', 'ACME TECHNOLOGIES PRIVATE LIMITED'),
+    ('Technologies Pvt Ltd', 'ACME TECHNOLOGIES PRIVATE LIMITED'),
+]
+
+
+def result_rows(*companies):
+    cells = ''.join(f'<tr><td>{cin}</td><td>{name}</td><td>Somewhere</td></tr>' for cin, name in companies)
+    return BeautifulSoup(f'<table>{cells}</table>', 'html.parser').find_all('tr')
+
+
+@pytest.mark.parametrize('query, name', FALSE_POSITIVES)
+def test_best_match_rejects_different_company(query, name):
+    index, score = best_match(query, [name])
+    assert index is None
+    assert score > 0
+
+
+@pytest.mark.parametrize('query, name', FALSE_POSITIVES)
+def test_matcher_rejects_different_company(query, name):
+    matcher = NameMatcher()
+    matcher.add(name)
+    assert matcher.match(query) == []
+    assert matcher.best(query) is None
+
+
+@pytest.mark.parametrize('query, name', FALSE_POSITIVES)
+def test_cin_index_rejects_different_company(query, name):
+    index = CinIndex()
+    index.add('U72900KA2015PTC000001', name)
+    assert index.lookup(query) == (None, 0.0)
+
+
+def test_best_match_accepts_spelling_variants():
+    assert best_match('Acme Technologies Pvt. Ltd.', ['ACME TECHNOLOGIES PRIVATE LIMITED']) == (0, 1.0)
+
+
+def test_best_match_rejects_close_runner_up():
+    names = ['ACME INFRA PROJECTS PRIVATE LIMITED', 'ACME INFRA PROJECT PRIVATE LIMITED']
+    index, _ = best_match('Acme Infra Projectz Pvt Ltd', names, threshold=0.5)
+    assert index is None
+
+
+def test_select_matches_rejects_fuzzy_false_positives():
+    zauba_scraper = pytest.importorskip('zauba_scraper')
+    # select_matches needs none of the browser state __init__ sets up
+    scraper = object.__new__(zauba_scraper.ZaubaScraper)
+    for query, name in FALSE_POSITIVES:
+        assert scraper.select_matches(query, result_rows(('U72900KA2015PTC000001', name))) == []
+
+
+def test_select_matches_keeps_every_exact_row():
+    zauba_scraper = pytest.importorskip('zauba_scraper')
+    scraper = object.__new__(zauba_scraper.ZaubaScraper)
+    rows = result_rows(('U1', 'ACME TECHNOLOGIES PRIVATE LIMITED'), ('U2', 'ACME TECHNOLOGIES PRIVATE LIMITED'),
+                       ('U3', 'ZETA TECHNOLOGIES PRIVATE LIMITED'))
+    assert [m['CIN'] for m in scraper.select_matches('Acme Technologies Pvt Ltd', rows)] == ['U1', 'U2']
@@ -0,0 +1,40 @@
+from collections import Counter
+
+from pagination import ListingProbe, discover_last_page, find_last_page
+
+PAGER_PATTERN = r'[?&]page=(\d+)'
+
+
+def listing(last_page, window=None, clamp=False):
+    """fetch_listing for a fake listing of `last_page` pages, counting fetches per page."""
+    fetches = Counter()
+
+    def fetch_listing(page):
+        fetches[page] += 1
+        shown = min(page, last_page) if clamp else page
+        rows = [f'company {shown}-{i}' for i in range(3)] if shown <= last_page else []
+        end = last_page if window is None else min(page + window, last_page)
+        pager = ''.join(f'<a href="/list?page={p}">{p}</a>' for p in range(1, end + 1))
+        return f'<div>{pager}</div>', rows
+
+    return fetch_listing, fetches
+
+
+def test_pager_page_is_fetched_once_and_kept():
+    fetch_listing, fetches = listing(40)
+    probe = ListingProbe(fetch_listing)
+    assert discover_last_page(1, PAGER_PATTERN, probe=probe) == 40
+    assert fetches[1] == 1
+    assert probe.rows[1] == ['company 1-0', 'company 1-1', 'company 1-2']
+
+
+def test_windowed_pager_searches_on():
+    fetch_listing, fetches = listing(75, window=10)
+    probe = ListingProbe(fetch_listing)
+    assert discover_last_page(1, PAGER_PATTERN, probe=probe) == 75
+    assert max(fetches.values()) == 1
+
+
+def test_clamped_listing_without_pager():
+    fetch_listing, _ = listing(23, clamp=True)
+    assert find_last_page(ListingProbe(fetch_listing), 1) == 23
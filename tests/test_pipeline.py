@@ -0,0 +1,51 @@
+import asyncio
+
+import pytest
+
+from pipeline import Pipeline, Stage
+
+
+def run(pipeline, items):
+    # A run that loses its end marker hangs; fail the test instead
+    return asyncio.run(asyncio.wait_for(pipeline.run_async(items), timeout=10))
+
+
+def test_items_flow_through_every_stage():
+    seen = []
+    pipeline = Pipeline([
+        Stage('double', lambda x: x * 2, workers=2),
+        Stage('split', lambda x: [x, x + 1], expand=True),
+    ], sink=seen.append)
+    assert run(pipeline, range(3)) == 6
+    assert sorted(seen) == [0, 1, 2, 3, 4, 5]
+
+
+def test_accepts_error_fails_only_that_item():
+    def accepts(item):
+        if item == 1:
+            raise ValueError('bad item')
+        return True
+
+    stage = Stage('double', lambda x: x * 2, accepts=accepts)
+    seen = []
+    assert run(Pipeline([stage], sink=seen.append), range(3)) == 2
+    assert sorted(seen) == [0, 4]
+    assert stage.failed == 1
+
+
+def test_input_error_ends_the_run():
+    def items():
+        yield 1
+        raise RuntimeError('input broke')
+
+    with pytest.raises(RuntimeError, match='input broke'):
+        run(Pipeline([Stage('same', lambda x: x)]), items())
+
+
+def test_sink_error_ends_the_run():
+    def sink(item):
+        raise KeyError('sink broke')
+
+    # More items than the queues hold, so upstream stages are blocked when the sink fails
+    with pytest.raises(KeyError):
+        run(Pipeline([Stage('same', lambda x: x, queue_size=2)], sink=sink), range(50))
@@ -0,0 +1,93 @@
+import csv
+import importlib
+import threading
+
+import pytest
+
+from startup_india_stub import make_server
+from state_store import StateStore
+
+
+@pytest.fixture
+def scraper(tmp_path, monkeypatch):
+    # The module opens scraper.log in the working directory on import
+    monkeypatch.chdir(tmp_path)
+    return importlib.import_module('startupIndiaScraper')
+
+
+@pytest.fixture
+def stub():
+    servers = []
+
+    def start(companies, **options):
+        server = make_server(0, companies, **options)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server, f'http://127.0.0.1:{server.server_address[1]}/search'
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def names(count):
+    return [f'Example Startup {i} Private Limited' for i in range(1, count + 1)]
+
+
+def read_output(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        return [row['Company Name'] for row in csv.DictReader(f)]
+
+
+def crawl(scraper, endpoint, page_size):
+    api = scraper.StartupIndiaApi(endpoint, page_size=page_size, rate=1000)
+    try:
+        return [name for _, page_names in api.iter_pages() for name in page_names]
+    finally:
+        api.close()
+
+
+def test_stops_at_total_pages(scraper, stub):
+    server, endpoint = stub(250)
+    assert crawl(scraper, endpoint, 100) == names(250)
+    assert server.requests == [0, 1, 2]
+
+
+def test_stops_at_empty_page_without_total_pages(scraper, stub):
+    server, endpoint = stub(250, total_pages=False)
+    assert crawl(scraper, endpoint, 100) == names(250)
+    assert server.requests == [0, 1, 2, 3]
+
+
+def test_stops_when_a_page_repeats(scraper, stub):
+    server, endpoint = stub(250, clamp=True, total_pages=False)
+    assert crawl(scraper, endpoint, 100) == names(250)
+    assert server.requests == [0, 1, 2, 3]
+
+
+def test_resumes_from_checkpoint(scraper, stub, tmp_path):
+    server, endpoint = stub(450)
+    state_path = str(tmp_path / 'state.sqlite')
+    output = str(tmp_path / 'out.csv')
+
+    class FailingApi(scraper.StartupIndiaApi):
+        def fetch_page(self, page):
+            if page == 2:
+                raise RuntimeError('connection lost')
+            return super().fetch_page(page)
+
+    checkpoint = scraper.PageCheckpoint('api', output, state=StateStore(state_path))
+    with pytest.raises(RuntimeError):
+        scraper.scrape_startup_india_api(checkpoint, FailingApi(endpoint, page_size=100, rate=1000))
+    checkpoint.close()
+    assert read_output(output) == names(200)
+
+    # A different page size on resume keeps the checkpointed one
+    checkpoint = scraper.PageCheckpoint('api', output, state=StateStore(state_path))
+    assert checkpoint.next_page == 2
+    count = scraper.scrape_startup_india_api(checkpoint, scraper.StartupIndiaApi(endpoint, page_size=50, rate=1000))
+    checkpoint.close()
+    assert count == 250
+    assert read_output(output) == names(450)
+    assert server.requests[-3:] == [2, 3, 4]
@@ -1,5 +1,6 @@
 import logging
 import sys
+import argparse
 import asyncio
 from datetime import datetime
 import threading
@@ -11,13 +12,25 @@ import pandas as pd
 import json
 import os
 from playwright.async_api import async_playwright
-from bs4 import BeautifulSoup
 from fake_useragent import UserAgent
 import urllib3
 import re
 from threading import Lock
 import backoff
 import nest_asyncio
+try:
+    import psutil
+except ImportError:
+    psutil = None
+from http_cache import HTTPCache, read_object
+from reparse import reparse
+from page_parser import make_soup
+from result_sink import StreamingSink
+from state_store import StateStore, DONE
+from rate_limiter import get_budget
+from company_store import CompanyStore, is_missing, normalize_cin
+from recrawl import RecrawlScheduler
+from http_fetcher import Fetcher
 
 # Disable SSL verification warnings
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -36,16 +49,198 @@ logger = logging.getLogger(__name__)
 # Enable nested event loops
 nest_asyncio.apply()
 
+TOFLER_BASE_URL = 'https://www.tofler.in/'
+TOFLER_HOST = 'www.tofler.in'
+TOFLER_RATE = 1 / 5  # requests per second across all workers
+
+STATE_NAMESPACE = 'tofler'
+
+# Present once the server-rendered company details are in the DOM
+TARGET_SELECTOR = 'section#registered-details-module'
+
+# Subtrees extract_company_data reads; the rest of the page is never parsed
+TOFLER_SCOPES = [
+    'h1.company-name', 'section#registered-details-module',
+    'div.registered-address', 'div.directors-section'
+]
+
+# h3 label in the registered details box -> output field; its value is the next span.text-base.
+# New fields only need an entry here.
+REGISTERED_FIELDS = {
+    'PAN': 'pan',
+    'Incorporation': 'incorporation_date',
+    'Company Email': 'email',
+    'Paid up Capital': 'paid_up_capital',
+    'Authorised Capital': 'authorized_capital',
+    'AGM': 'agm',
+}
+REGISTERED_VALUE_CLASS = 'text-base'
+
+OUTPUT_COLUMNS = [
+    'original_name', 'cin', 'name', 'incorporation_date', 'status',
+    'authorized_capital', 'paid_up_capital', 'registered_address',
+    'email', 'pan', 'agm', 'company_type', 'directors'
+]
+# Fields added to REGISTERED_FIELDS go after the existing columns
+OUTPUT_COLUMNS += [field for field in REGISTERED_FIELDS.values() if field not in OUTPUT_COLUMNS]
+
+# A company already holding these in the company store (from any source) is not scraped again
+TOFLER_KNOWN_FIELDS = ['name', 'incorporation_date', 'paid_up_capital']
+
+def extract_registered_fields(registered_box, fields=REGISTERED_FIELDS):
+    """Read every labelled value in the registered details box in one traversal.
+
+    The first h3 with each label is matched against `fields`; each waits for
+    the next span.text-base after it, which is the element find_next would
+    return. Labels whose value lies beyond the box fall back to find_next.
+    """
+    values = {}
+    seen = set()
+    pending = []
+    for node in registered_box.descendants:
+        name = getattr(node, 'name', None)
+        if name == 'h3':
+            label = node.string
+            if label in fields and label not in seen:
+                seen.add(label)
+                pending.append((fields[label], node))
+        elif name == 'span' and pending and REGISTERED_VALUE_CLASS in node.get('class', ()):
+            text = node.get_text(strip=True)
+            for field, _ in pending:
+                values[field] = text
+            pending = []
+    for field, label_elem in pending:
+        value_elem = label_elem.find_next('span', class_=REGISTERED_VALUE_CLASS)
+        if value_elem:
+            values[field] = value_elem.get_text(strip=True)
+    return values
+
+def extract_company_data(soup, original_name, cin):
+    """Extract company data from the HTML content."""
+    company_data = {
+        'original_name': original_name,
+        'cin': cin,
+        'name': 'Not Available',
+        'incorporation_date': 'Not Available',
+        'status': 'Not Available',
+        'authorized_capital': 'Not Available',
+        'paid_up_capital': 'Not Available',
+        'registered_address': 'Not Available',
+        'email': 'Not Available',
+        'pan': 'Not Available',
+        'agm': 'Not Available',
+        'company_type': 'Not Available',
+        'directors': []
+    }
+    for field in REGISTERED_FIELDS.values():
+        company_data.setdefault(field, 'Not Available')
+    
+    try:
+        # Extract company name
+        name_elem = soup.find('h1', class_='company-name')
+        if name_elem:
+            company_data['name'] = name_elem.get_text(strip=True)
+        
+        # Find the registered details section
+        registered_section = soup.find('section', id='registered-details-module')
+        if registered_section:
+            # Extract details from the registered box wrapper
+            registered_box = registered_section.find('div', class_='registered_box_wrapper')
+            if registered_box:
+                company_data.update(extract_registered_fields(registered_box))
+            
+            # Extract Company Type
+            type_section = registered_section.find('div', class_='flex-col gap-8')
+            if type_section:
+                type_badges = type_section.find_all('div', class_='badge')
+                if type_badges:
+                    company_types = [badge.get_text(strip=True) for badge in type_badges]
+                    company_data['company_type'] = ', '.join(company_types)
+        
+        # Extract registered address
+        address_elem = soup.find('div', class_='registered-address')
+        if address_elem:
+            company_data['registered_address'] = address_elem.get_text(strip=True)
+        
+        # Extract directors
+        directors_section = soup.find('div', class_='directors-section')
+        if directors_section:
+            director_elems = directors_section.find_all('div', class_='director-info')
+            for elem in director_elems:
+                director_name = elem.find('div', class_='director-name')
+                if director_name:
+                    company_data['directors'].append(director_name.get_text(strip=True))
+        
+        return company_data
+        
+    except Exception as e:
+        logger.error(f"Error extracting company data: {str(e)}")
+        return company_data
+
+def reparse_cached_page(job):
+    """Process-pool worker: re-extract one cached Tofler page."""
+    path, encoding, original_name, cin = job
+    soup = make_soup(read_object(path, encoding), scope=TOFLER_SCOPES)
+    company_data = extract_company_data(soup, original_name, cin)
+    company_data['directors'] = '|'.join(company_data['directors'])
+    return company_data
+
+def reparse_cache(companies_file='4000_FTSIDB.csv', output_file='tofler_ultra_company_data_reparsed.csv', workers=None):
+    """Rebuild company data from cached Tofler pages without a browser or network."""
+    names = {}
+    if os.path.exists(companies_file):
+        df = pd.read_csv(companies_file)
+        names = dict(zip(df['CIN'].astype(str), df['Name']))
+    
+    jobs = []
+    for url, path, encoding in HTTPCache().iter_entries(TOFLER_BASE_URL):
+        # URLs look like https://www.tofler.in/<name>/company/<CIN>
+        cin = url.rstrip('/').rsplit('/', 1)[-1]
+        jobs.append((path, encoding, names.get(cin, 'Not Available'), cin))
+    reparse(jobs, reparse_cached_page, output_file, OUTPUT_COLUMNS, workers=workers)
+
+# Subresources the extractor never looks at; aborting them skips their download and render
+BLOCKED_RESOURCE_TYPES = {'image', 'media', 'font', 'stylesheet', 'texttrack', 'manifest'}
+BLOCKED_URL_PATTERNS = ('google-analytics.com', 'googletagmanager.com', 'doubleclick.net',
+                        'facebook.net', 'hotjar.com', 'clarity.ms')
+
+class BrowserLease:
+    """A browser/context pair checked out of the pool by one worker."""
+    def __init__(self, browser, context):
+        self.browser = browser
+        self.context = context
+        self.started = time.monotonic()
+
 class BrowserManager:
-    def __init__(self, max_browsers=2):
+    """Bounded pool of Chromium instances handed out as leases.
+    
+    At most `target_size` browsers are alive at once. The target starts at
+    `min_browsers` and grows while workers spend a noticeable share of their
+    time waiting for a lease, up to `max_browsers` and to however many
+    browsers fit under `rss_ceiling_mb` at the observed memory per browser.
+    It shrinks again when browsers keep sitting idle.
+    """
+    def __init__(self, max_browsers=2, min_browsers=1, rss_ceiling_mb=4096, block_resources=True,
+                 wait_until='domcontentloaded', max_pages_per_context=2):
         self.max_browsers = max_browsers
-        self.semaphore = asyncio.Semaphore(max_browsers)
-        self.browser_pool = []
+        self.min_browsers = max(1, min(min_browsers, max_browsers))
+        self.target_size = self.min_browsers
+        self.rss_ceiling_mb = rss_ceiling_mb
+        self.in_use = 0
+        self.waiters = 0
+        self.idle_checkins = 0
+        self.wait_time_avg = 0.0
+        self.lease_time_avg = 0.0
+        self.pool_changed = asyncio.Condition()
+        self.block_resources = block_resources
+        # 'domcontentloaded' plus a target-selector wait, or the old 'networkidle'
+        self.wait_until = wait_until
+        self.max_pages_per_context = max_pages_per_context
+        self.idle_pages = {}
+        self.browser_pool = []  # idle (browser, context) pairs
         self.playwright = None
         self.lock = asyncio.Lock()
         self.initialized = False
-        self.last_request_time = 0
-        self.min_request_interval = 5  # Minimum seconds between requests
         self.proxies = [
             # Add your proxies here in the format:
             # {'server': 'http://proxy1.example.com:8080', 'username': 'user1', 'password': 'pass1'},
@@ -74,92 +269,171 @@ class BrowserManager:
                         logger.error(f"Error initializing Playwright: {str(e)}")
                         raise
         
-    async def get_browser(self):
-        """Get a browser from the pool or create a new one."""
+    async def checkout(self):
+        """Lease a browser, waiting while the pool is at its target size."""
         await self.initialize()
         
-        # Ensure minimum time between requests
-        current_time = time.time()
-        time_since_last = current_time - self.last_request_time
-        if time_since_last < self.min_request_interval:
-            await asyncio.sleep(self.min_request_interval - time_since_last)
-        self.last_request_time = current_time
-        
-        async with self.semaphore:
+        wait_started = time.monotonic()
+        async with self.pool_changed:
+            self.waiters += 1
             try:
-                if self.browser_pool:
-                    browser, context = self.browser_pool.pop()
-                    if browser.is_connected():
-                        return browser, context
-                    else:
-                        await self.cleanup_browser(browser, context)
-            except Exception as e:
-                logger.error(f"Error getting browser from pool: {str(e)}")
+                await self.pool_changed.wait_for(lambda: self.in_use < self.target_size)
+            finally:
+                self.waiters -= 1
+            self.in_use += 1
+        self.wait_time_avg = 0.8 * self.wait_time_avg + 0.2 * (time.monotonic() - wait_started)
+        
+        try:
+            while self.browser_pool:
+                browser, context = self.browser_pool.pop()
+                if browser.is_connected():
+                    return BrowserLease(browser, context)
+                await self.cleanup_browser(browser, context)
+            browser, context = await self.launch_browser()
+            return BrowserLease(browser, context)
+        except Exception:
+            # Give the slot back if no browser could be handed out
+            async with self.pool_changed:
+                self.in_use -= 1
+                self.pool_changed.notify()
+            raise
+
+    async def launch_browser(self):
+        """Launch a new Chromium with a configured context."""
+        try:
+            proxy = self.get_next_proxy()
+            browser = await self.playwright.chromium.launch(
+                headless=True,
+                args=[
+                    '--no-sandbox',
+                    '--disable-setuid-sandbox',
+                    '--disable-dev-shm-usage',
+                    '--disable-accelerated-2d-canvas',
+                    '--disable-gpu',
+                    '--window-size=1920,1080'
+                ]
+            )
             
-            # Create new browser
-            try:
-                proxy = self.get_next_proxy()
-                browser = await self.playwright.chromium.launch(
-                    headless=True,
-                    args=[
-                        '--no-sandbox',
-                        '--disable-setuid-sandbox',
-                        '--disable-dev-shm-usage',
-                        '--disable-accelerated-2d-canvas',
-                        '--disable-gpu',
-                        '--window-size=1920,1080'
-                    ]
-                )
-                
-                context_options = {
-                    'viewport': {'width': 1920, 'height': 1080},
-                    'user_agent': UserAgent().random,
-                    'ignore_https_errors': True,
-                    'bypass_csp': True
+            context_options = {
+                'viewport': {'width': 1920, 'height': 1080},
+                'user_agent': UserAgent().random,
+                'ignore_https_errors': True,
+                'bypass_csp': True
+            }
+            
+            if proxy:
+                context_options['proxy'] = {
+                    'server': proxy['server'],
+                    'username': proxy['username'],
+                    'password': proxy['password']
                 }
-                
-                if proxy:
-                    context_options['proxy'] = {
-                        'server': proxy['server'],
-                        'username': proxy['username'],
-                        'password': proxy['password']
-                    }
-                
-                context = await browser.new_context(**context_options)
-                
-                # Set extra headers
-                await context.set_extra_http_headers({
-                    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-                    'Accept-Language': 'en-US,en;q=0.5',
-                    'Cache-Control': 'no-cache',
-                    'Pragma': 'no-cache',
-                })
-                
-                return browser, context
-            except Exception as e:
-                logger.error(f"Error creating new browser: {str(e)}")
-                raise
             
-    async def return_browser(self, browser_tuple):
-        """Return a browser to the pool."""
-        if not isinstance(browser_tuple, tuple) or len(browser_tuple) != 2:
-            logger.error("Invalid browser tuple provided")
-            return
+            context = await browser.new_context(**context_options)
+            
+            # Set extra headers
+            await context.set_extra_http_headers({
+                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+                'Accept-Language': 'en-US,en;q=0.5',
+                'Cache-Control': 'no-cache',
+                'Pragma': 'no-cache',
+            })
             
-        browser, context = browser_tuple
+            if self.block_resources:
+                await context.route('**/*', self.route_request)
+            
+            return browser, context
+        except Exception as e:
+            logger.error(f"Error creating new browser: {str(e)}")
+            raise
+
+    async def route_request(self, route):
+        """Abort subresources that do not affect the server-rendered markup."""
+        request = route.request
+        if request.resource_type in BLOCKED_RESOURCE_TYPES or any(
+                pattern in request.url for pattern in BLOCKED_URL_PATTERNS):
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def get_page(self, context):
+        """Reuse a warm page from this context, or open a new one."""
+        pages = self.idle_pages.get(context, [])
+        while pages:
+            page = pages.pop()
+            if not page.is_closed():
+                return page
+        return await context.new_page()
+
+    async def release_page(self, context, page, reuse=True):
+        """Keep a page warm for the next company, or close it."""
+        pages = self.idle_pages.setdefault(context, [])
+        if reuse and not page.is_closed() and len(pages) < self.max_pages_per_context:
+            pages.append(page)
+            return
         try:
-            if browser.is_connected():
-                self.browser_pool.append((browser, context))
-            else:
-                await self.cleanup_browser(browser, context)
+            await page.close()
         except Exception as e:
-            logger.error(f"Error returning browser: {str(e)}")
+            logger.error(f"Error closing page: {str(e)}")
+
+    async def checkin(self, lease, healthy=True):
+        """Return a leased browser; it is kept idle only if the pool still wants it."""
+        self.lease_time_avg = 0.8 * self.lease_time_avg + 0.2 * (time.monotonic() - lease.started)
+        self.adjust_pool_size()
+        try:
+            keep = healthy and lease.browser.is_connected()
+        except Exception:
+            keep = False
+        # Browsers alive after this checkin: other leases, idle ones and this one
+        if keep and (self.in_use - 1) + len(self.browser_pool) < self.target_size:
+            self.browser_pool.append((lease.browser, lease.context))
+        else:
+            await self.cleanup_browser(lease.browser, lease.context)
+        # Close idle browsers beyond a target that just shrank
+        while self.browser_pool and (self.in_use - 1) + len(self.browser_pool) > self.target_size:
+            browser, context = self.browser_pool.pop(0)
             await self.cleanup_browser(browser, context)
-        finally:
-            self.semaphore.release()
-            
+        async with self.pool_changed:
+            self.in_use -= 1
+            self.pool_changed.notify_all()
+
+    def memory_per_browser(self):
+        """Observed RSS in MB per live browser, or None if it cannot be measured."""
+        live = self.in_use + len(self.browser_pool)
+        if psutil is None or live == 0:
+            return None
+        try:
+            # Chromium and the Playwright driver all run as children of this process
+            rss = sum(child.memory_info().rss for child in psutil.Process().children(recursive=True))
+        except psutil.Error:
+            return None
+        return rss / live / (1024 * 1024)
+
+    def adjust_pool_size(self):
+        """Grow the target while workers queue for browsers, shrink it while browsers idle."""
+        ceiling = self.max_browsers
+        per_browser = self.memory_per_browser()
+        if per_browser:
+            ceiling = min(ceiling, max(self.min_browsers, int(self.rss_ceiling_mb // per_browser)))
+        
+        if self.target_size > ceiling:
+            self.target_size = ceiling
+            logger.info(f"Browser pool shrunk to {self.target_size} ({per_browser:.0f} MB per browser)")
+        elif self.waiters and self.wait_time_avg > 0.25 * self.lease_time_avg and self.target_size < ceiling:
+            self.target_size += 1
+            self.idle_checkins = 0
+            logger.info(f"Browser pool grown to {self.target_size}")
+        elif not self.waiters and self.browser_pool:
+            self.idle_checkins += 1
+            if self.idle_checkins >= 10 and self.target_size > self.min_browsers:
+                self.target_size -= 1
+                self.idle_checkins = 0
+                logger.info(f"Browser pool shrunk to {self.target_size} (idle browsers)")
+        else:
+            self.idle_checkins = 0
+
     async def cleanup_browser(self, browser, context):
         """Clean up browser resources."""
+        self.idle_pages.pop(context, None)
         try:
             if context:
                 await context.close()
@@ -181,38 +455,62 @@ class BrowserManager:
             logger.error(f"Error closing all browsers: {str(e)}")
 
 class ToflerUltraScraper:
-    def __init__(self, max_workers=3):
+    def __init__(self, max_workers=3, http_first=True, refresh=False, parquet_dir=None):
         logger.info("Initializing ToflerUltraScraper...")
         self.max_workers = max_workers
         self.output_file = 'tofler_ultra_company_data.csv'
+        self.parquet_dir = parquet_dir
         self.session_file = 'tofler_ultra_session.json'
         self.companies = []
         self.result_queue = asyncio.Queue()
+        # Results are written in batches bounded by count and by time
+        self.batch_size = 25
+        self.batch_max_wait = 2.0
         self.lock = asyncio.Lock()
-        self.browser_manager = BrowserManager(max_browsers=2)
+        # Never more browsers than workers; the pool sizes itself below that
+        self.browser_manager = BrowserManager(max_browsers=max_workers)
+        # Shared per-host limiter: evenly spaced requests at exactly the allowed rate
+        self.rate_budget = get_budget(TOFLER_HOST, rate=TOFLER_RATE, kind='leaky')
+        # Rendered pages are cached by URL so re-runs skip the browser entirely
+        self.cache = HTTPCache()
+        # Most company pages are server-rendered, so try plain HTTP before a browser
+        self.http_first = http_first
+        # Stale cached pages are revalidated with their ETag/Last-Modified instead of refetched
+        self.fetcher = Fetcher(pool_connections=1, pool_maxsize=max_workers, cache=self.cache)
+        self.http_count = 0
+        self.browser_count = 0
         self.processed_count = 0
         self.success_count = 0
         self.failure_count = 0
+        self.state = StateStore()
+        self.company_store = CompanyStore()
+        # Refresh runs revisit only companies that are due, and only write rows that changed
+        self.refresh = refresh
+        self.recrawl = RecrawlScheduler(self.state, STATE_NAMESPACE)
         self.load_session()
         logger.info(f"Initialized with max_workers={max_workers}")
 
     def load_session(self):
-        """Load session data from file."""
+        """Load session data from the state store."""
         try:
-            if os.path.exists(self.session_file):
+            # One-time import of a JSON checkpoint left by an older run
+            if not self.state.has_namespace(STATE_NAMESPACE) and os.path.exists(self.session_file):
                 with open(self.session_file, 'r') as f:
-                    session_data = json.load(f)
-                    self.processed_count = session_data.get('processed_count', 0)
-                    self.success_count = session_data.get('success_count', 0)
-                    self.failure_count = session_data.get('failure_count', 0)
+                    self.state.set_meta(STATE_NAMESPACE, 'session', json.load(f))
+                logger.info(f"Migrated {self.session_file} into {self.state.path}")
+            session_data = self.state.get_meta(STATE_NAMESPACE, 'session')
+            if session_data:
+                self.processed_count = session_data.get('processed_count', 0)
+                self.success_count = session_data.get('success_count', 0)
+                self.failure_count = session_data.get('failure_count', 0)
                 logger.info(f"Loaded session data: processed={self.processed_count}, success={self.success_count}, failure={self.failure_count}")
             else:
-                logger.info("No session file found, starting new session")
+                logger.info("No saved session found, starting new session")
         except Exception as e:
             logger.error(f"Error loading session: {str(e)}")
 
-    async def save_session(self):
-        """Save session data to file."""
+    async def save_session(self, done_cins=()):
+        """Save session data to the state store, marking written CINs as done in the same transaction."""
         try:
             session_data = {
                 'processed_count': self.processed_count,
@@ -221,8 +519,10 @@ class ToflerUltraScraper:
                 'last_update': datetime.now().isoformat()
             }
             async with self.lock:
-                with open(self.session_file, 'w') as f:
-                    json.dump(session_data, f)
+                with self.state.batch():
+                    if done_cins:
+                        self.state.mark_many(STATE_NAMESPACE, done_cins, DONE)
+                    self.state.set_meta(STATE_NAMESPACE, 'session', session_data)
             logger.info(f"Saved session data: processed={self.processed_count}, success={self.success_count}, failure={self.failure_count}")
         except Exception as e:
             logger.error(f"Error saving session: {str(e)}")
@@ -236,33 +536,24 @@ class ToflerUltraScraper:
     def generate_tofler_url(self, company_name, cin):
         """Generate Tofler URL from company name and CIN."""
         formatted_name = self.format_company_name(company_name)
-        return f"https://www.tofler.in/{formatted_name}/company/{cin}"
+        return f"{TOFLER_BASE_URL}{formatted_name}/company/{cin}"
 
-    @backoff.on_exception(backoff.expo, 
-        (Exception),
-        max_tries=3,
-        max_time=180,  # 3 minutes max wait
-        jitter=backoff.full_jitter)  # Add jitter to avoid thundering herd
-    async def scrape_company_details(self, company_name, cin):
-        """Scrape company details using a browser from the pool."""
-        browser = None
-        context = None
+    async def render_page(self, url):
+        """Load a page in a pooled browser and return its rendered HTML."""
+        lease = None
         page = None
-        start_time = datetime.now()
+        page_ok = False
         
         try:
-            browser, context = await self.browser_manager.get_browser()
-            page = await context.new_page()
-            
-            url = self.generate_tofler_url(company_name, cin)
-            logger.info(f"Scraping {company_name} (CIN: {cin}) - URL: {url}")
-            
-            # Add random delay between requests (5-10 seconds)
-            await asyncio.sleep(random.uniform(5, 10))
+            lease = await self.browser_manager.checkout()
+            page = await self.browser_manager.get_page(lease.context)
             
             # Navigate to the page with retry logic and longer timeout
             try:
-                response = await page.goto(url, timeout=30000, wait_until='networkidle')
+                # Take the send slot only now: a slot reserved while waiting for a lease would
+                # have expired by the time the lease frees up, and every waiter would go at once
+                await self.rate_budget.acquire()
+                response = await page.goto(url, timeout=30000, wait_until=self.browser_manager.wait_until)
                 if not response:
                     raise Exception("Failed to get response from page")
                 if response.status >= 400:
@@ -276,20 +567,65 @@ class ToflerUltraScraper:
             
             # Wait for key elements to load
             try:
-                await page.wait_for_selector('section#registered-details-module', timeout=30000)
+                await page.wait_for_selector(TARGET_SELECTOR, timeout=30000)
             except Exception as e:
                 logger.warning(f"Timeout waiting for content on {url}: {str(e)}")
             
             # Get page content
             content = await page.content()
-            soup = BeautifulSoup(content, 'html.parser')
+            page_ok = True
+            return content
+        finally:
+            if page:
+                # Pages that errored are closed rather than reused
+                await self.browser_manager.release_page(lease.context, page, reuse=page_ok)
+            if lease:
+                try:
+                    await self.browser_manager.checkin(lease)
+                except Exception as e:
+                    logger.error(f"Error returning browser: {str(e)}")
+
+    @backoff.on_exception(backoff.expo, 
+        (Exception),
+        max_tries=3,
+        max_time=180,  # 3 minutes max wait
+        jitter=backoff.full_jitter)  # Add jitter to avoid thundering herd
+    async def scrape_company_details(self, company_name, cin):
+        """Scrape company details, from the page cache or a browser from the pool."""
+        start_time = datetime.now()
+        
+        try:
+            url = self.generate_tofler_url(company_name, cin)
+            logger.info(f"Scraping {company_name} (CIN: {cin}) - URL: {url}")
             
-            company_data = self.extract_company_data(soup, company_name, cin)
-            logger.info(f"Extracted data for {company_name}: {company_data}")
+            # Cheapest source first: page cache, then plain HTTP, then a browser
+            company_data = None
+            entry, body = self.cache.lookup(url)
+            if entry is not None and self.cache.is_fresh(entry):
+                logger.info(f"Using cached page for {company_name}")
+                company_data = self.parse_company_page(body.decode(entry['encoding'] or 'utf-8'), company_name, cin)
+            
+            if company_data is None and self.http_first:
+                response = await self.fetch_http(url)
+                company_data = self.parse_company_page(response.text if response is not None else None,
+                                                       company_name, cin)
+                if company_data is not None:
+                    # A 304 already refreshed the entry; a new page is cached only once it has validated
+                    if not response.from_cache:
+                        self.cache.store(url, response.content, headers=response.headers, encoding=response.encoding)
+                    self.http_count += 1
+                else:
+                    logger.info(f"HTTP fetch failed validation for {company_name}, falling back to browser")
             
-            # Validate extracted data
-            if not company_data['name'] or company_data['name'] == 'Not Available':
-                raise Exception("Failed to extract company name - possible invalid page or blocking")
+            if company_data is None:
+                content = await self.render_page(url)
+                company_data = self.parse_company_page(content, company_name, cin)
+                if company_data is None:
+                    raise Exception("Failed to extract company name - possible invalid page or blocking")
+                self.cache.store(url, content)
+                self.browser_count += 1
+            
+            logger.info(f"Extracted data for {company_name}: {company_data}")
             
             # Add to result queue
             await self.result_queue.put(company_data)
@@ -307,170 +643,140 @@ class ToflerUltraScraper:
             async with self.lock:
                 self.failure_count += 1
             raise
-        finally:
-            if page:
-                try:
-                    await page.close()
-                except Exception as e:
-                    logger.error(f"Error closing page: {str(e)}")
-            if browser and context:
-                try:
-                    await self.browser_manager.return_browser((browser, context))
-                except Exception as e:
-                    logger.error(f"Error returning browser: {str(e)}")
-                    await self.browser_manager.cleanup_browser(browser, context)
 
     def extract_company_data(self, soup, original_name, cin):
         """Extract company data from the HTML content."""
-        company_data = {
-            'original_name': original_name,
-            'cin': cin,
-            'name': 'Not Available',
-            'incorporation_date': 'Not Available',
-            'status': 'Not Available',
-            'authorized_capital': 'Not Available',
-            'paid_up_capital': 'Not Available',
-            'registered_address': 'Not Available',
-            'email': 'Not Available',
-            'pan': 'Not Available',
-            'agm': 'Not Available',
-            'company_type': 'Not Available',
-            'directors': []
-        }
-        
+        return extract_company_data(soup, original_name, cin)
+
+    def parse_company_page(self, content, original_name, cin):
+        """Extract company data from a page, or return None if it has no company name.
+
+        Only validated pages are cached, so block or challenge pages never are.
+        """
+        if not content:
+            return None
+        soup = make_soup(content, scope=TOFLER_SCOPES)
+        company_data = self.extract_company_data(soup, original_name, cin)
+        if not company_data['name'] or company_data['name'] == 'Not Available':
+            return None
+        return company_data
+
+    async def fetch_http(self, url):
+        """Fetch a page over pooled keep-alive HTTP, revalidating a stale cached copy; None on any HTTP error.
+
+        A 200 is not cached here: the caller stores it once it has passed
+        the company-name check. `from_cache` is True after a 304.
+        """
+        await self.rate_budget.acquire()
         try:
-            # Extract company name
-            name_elem = soup.find('h1', class_='company-name')
-            if name_elem:
-                company_data['name'] = name_elem.get_text(strip=True)
-            
-            # Find the registered details section
-            registered_section = soup.find('section', id='registered-details-module')
-            if registered_section:
-                # Extract details from the registered box wrapper
-                registered_box = registered_section.find('div', class_='registered_box_wrapper')
-                if registered_box:
-                    # Extract PAN
-                    pan_elem = registered_box.find('h3', string='PAN')
-                    if pan_elem:
-                        pan_value = pan_elem.find_next('span', class_='text-base')
-                        if pan_value:
-                            company_data['pan'] = pan_value.get_text(strip=True)
-                    
-                    # Extract Incorporation date
-                    incorp_elem = registered_box.find('h3', string='Incorporation')
-                    if incorp_elem:
-                        incorp_value = incorp_elem.find_next('span', class_='text-base')
-                        if incorp_value:
-                            company_data['incorporation_date'] = incorp_value.get_text(strip=True)
-                    
-                    # Extract Company Email
-                    email_elem = registered_box.find('h3', string='Company Email')
-                    if email_elem:
-                        email_value = email_elem.find_next('span', class_='text-base')
-                        if email_value:
-                            company_data['email'] = email_value.get_text(strip=True)
-                    
-                    # Extract Paid up Capital
-                    paid_cap_elem = registered_box.find('h3', string='Paid up Capital')
-                    if paid_cap_elem:
-                        paid_cap_value = paid_cap_elem.find_next('span', class_='text-base')
-                        if paid_cap_value:
-                            company_data['paid_up_capital'] = paid_cap_value.get_text(strip=True)
-                    
-                    # Extract Authorised Capital
-                    auth_cap_elem = registered_box.find('h3', string='Authorised Capital')
-                    if auth_cap_elem:
-                        auth_cap_value = auth_cap_elem.find_next('span', class_='text-base')
-                        if auth_cap_value:
-                            company_data['authorized_capital'] = auth_cap_value.get_text(strip=True)
-                    
-                    # Extract AGM
-                    agm_elem = registered_box.find('h3', string='AGM')
-                    if agm_elem:
-                        agm_value = agm_elem.find_next('span', class_='text-base')
-                        if agm_value:
-                            company_data['agm'] = agm_value.get_text(strip=True)
-                
-                # Extract Company Type
-                type_section = registered_section.find('div', class_='flex-col gap-8')
-                if type_section:
-                    type_badges = type_section.find_all('div', class_='badge')
-                    if type_badges:
-                        company_types = [badge.get_text(strip=True) for badge in type_badges]
-                        company_data['company_type'] = ', '.join(company_types)
-            
-            # Extract registered address
-            address_elem = soup.find('div', class_='registered-address')
-            if address_elem:
-                company_data['registered_address'] = address_elem.get_text(strip=True)
-            
-            # Extract directors
-            directors_section = soup.find('div', class_='directors-section')
-            if directors_section:
-                director_elems = directors_section.find_all('div', class_='director-info')
-                for elem in director_elems:
-                    director_name = elem.find('div', class_='director-name')
-                    if director_name:
-                        company_data['directors'].append(director_name.get_text(strip=True))
-            
-            return company_data
-            
+            response = await asyncio.to_thread(self.fetcher.get, url, store=False, verify=False)
         except Exception as e:
-            logger.error(f"Error extracting company data: {str(e)}")
-            return company_data
+            logger.info(f"HTTP fetch error for {url}: {str(e)}")
+            return None
+        if response.status_code != 200:
+            logger.info(f"HTTP fetch for {url} returned status {response.status_code}")
+            return None
+        return response
 
-    async def save_results(self):
-        """Save results from the queue to CSV file."""
+    async def collect_batch(self, follow):
+        """Take up to batch_size results, waiting at most batch_max_wait after the first one."""
+        if follow:
+            first = await self.result_queue.get()
+        else:
+            try:
+                first = await asyncio.wait_for(self.result_queue.get(), timeout=1)
+            except asyncio.TimeoutError:
+                return []
+        batch = [first]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.batch_max_wait
+        while len(batch) < self.batch_size:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                # Wait on the queue itself; no polling between results
+                batch.append(await asyncio.wait_for(self.result_queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def save_results(self, follow=False):
+        """Save results from the queue to CSV file in micro-batches.
+        
+        Each batch is one buffered CSV write plus one session checkpoint. With
+        follow=True this keeps running until cancelled; otherwise it returns
+        once the queue has been idle for a second.
+        """
+        sink = None
         try:
-            columns = [
-                'original_name', 'cin', 'name', 'incorporation_date', 'status',
-                'authorized_capital', 'paid_up_capital', 'registered_address',
-                'email', 'pan', 'agm', 'company_type', 'directors'
-            ]
-            
-            # Create empty DataFrame with correct columns if file doesn't exist
-            if not os.path.exists(self.output_file):
-                empty_df = pd.DataFrame(columns=columns)
-                empty_df.to_csv(self.output_file, index=False)
-                logger.info(f"Created new output file with headers: {self.output_file}")
+            # Header is only written when the file is new or empty
+            sink = StreamingSink(self.output_file, OUTPUT_COLUMNS, batch_size=self.batch_size,
+                                 parquet_dir=self.parquet_dir)
             
             while True:
-                try:
-                    logger.info("Waiting for data in result queue...")
-                    company_data = await asyncio.wait_for(self.result_queue.get(), timeout=1)
-                    logger.info(f"Got data from queue: {company_data}")
-                    
-                    # Convert directors list to string
-                    if 'directors' in company_data:
-                        company_data['directors'] = '|'.join(company_data['directors'])
-                    
-                    # Ensure all columns exist
-                    for col in columns:
-                        if col not in company_data:
-                            company_data[col] = 'Not Available'
-                    
-                    # Create DataFrame with specific column order
-                    df = pd.DataFrame([company_data], columns=columns)
-                    logger.info(f"Created DataFrame with columns: {df.columns.tolist()}")
-                    
-                    # Save to CSV
-                    df.to_csv(self.output_file, mode='a', header=False, index=False)
-                    logger.info(f"Saved data for company: {company_data.get('name', 'Unknown')}")
-                    
-                    # Update session and mark task as done
-                    await self.save_session()
-                    self.result_queue.task_done()
-                    
-                except asyncio.TimeoutError:
+                batch = await self.collect_batch(follow)
+                if not batch:
                     logger.info("No more data in queue, save_results finishing")
                     break
+                try:
+                    fingerprints = []
+                    for company_data in batch:
+                        # Convert directors list to string
+                        if isinstance(company_data.get('directors'), list):
+                            company_data['directors'] = '|'.join(company_data['directors'])
+                        
+                        # Ensure all columns exist
+                        for col in OUTPUT_COLUMNS:
+                            if col not in company_data:
+                                company_data[col] = 'Not Available'
+                        fingerprint = {key: value for key, value in company_data.items() if key != 'original_name'}
+                        fingerprints.append((company_data['cin'], fingerprint))
+                        if self.refresh and not self.recrawl.has_changed(company_data['cin'], fingerprint):
+                            continue
+                        sink.write(company_data)
+                    sink.checkpoint()
+                    # Hashes are recorded only once the rows they describe are on disk
+                    self.recrawl.record_many(fingerprints)
+                    logger.info(f"Saved batch of {len(batch)} companies to {self.output_file}")
+                    self.company_store.upsert_many(
+                        [{key: value for key, value in company_data.items() if key != 'original_name'}
+                         for company_data in batch],
+                        'tofler'
+                    )
+                    
+                    # A CIN only counts as done once its row is on disk
+                    await self.save_session(done_cins=[company_data['cin'] for company_data in batch])
                 except Exception as e:
                     logger.error(f"Error saving results: {str(e)}")
-                    continue
+                finally:
+                    for _ in batch:
+                        self.result_queue.task_done()
                     
         except Exception as e:
             logger.error(f"Error in save_results: {str(e)}")
+        finally:
+            if sink:
+                sink.close()
+
+    def pending_companies(self):
+        """Companies whose CIN has not been written yet, including ones that failed."""
+        if self.refresh:
+            due = set(self.recrawl.due(cin for _, cin in self.companies))
+            return [(company_name, cin) for company_name, cin in self.companies if cin in due]
+        done = self.state.keys_with_status(STATE_NAMESPACE, DONE)
+        done |= self.company_store.known_cins(TOFLER_KNOWN_FIELDS)
+        return [(company_name, cin) for company_name, cin in self.companies if cin not in done]
+
+    async def process_company(self, company_name, cin):
+        """Scrape one company, recording a failure against its CIN."""
+        try:
+            await self.scrape_company_details(company_name, cin)
+        except Exception as e:
+            self.state.mark_failed(STATE_NAMESPACE, cin, e)
+        finally:
+            # Counted on completion, not when scheduled
+            self.processed_count += 1
 
     async def process_companies(self):
         """Process companies in parallel using asyncio tasks."""
@@ -479,12 +785,18 @@ class ToflerUltraScraper:
             start_time = datetime.now()
             total_companies = len(self.companies)
             
+            # Resume from exact per-CIN state rather than a position in the input file
+            pending_companies = self.pending_companies()
+            self.processed_count = total_companies - len(pending_companies)
+            completed_before = self.processed_count
+            logger.info(f"{self.processed_count} companies already done, {len(pending_companies)} to scrape")
+            
             # Start save_results task
-            save_task = asyncio.create_task(self.save_results())
+            save_task = asyncio.create_task(self.save_results(follow=True))
             logger.info("Started save_results task")
             
-            for i, (company_name, cin) in enumerate(self.companies[self.processed_count:]):
-                task = asyncio.create_task(self.scrape_company_details(company_name, cin))
+            for i, (company_name, cin) in enumerate(pending_companies):
+                task = asyncio.create_task(self.process_company(company_name, cin))
                 tasks.append(task)
                 
                 if len(tasks) >= self.max_workers:
@@ -492,13 +804,13 @@ class ToflerUltraScraper:
                     done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
                     tasks = list(pending)
                 
-                self.processed_count += 1
                 if i % 10 == 0:  # Save session every 10 companies
                     await self.save_session()
                     
                     # Calculate and log detailed progress
                     elapsed_time = (datetime.now() - start_time).total_seconds()
-                    companies_per_hour = (self.processed_count / elapsed_time) * 3600 if elapsed_time > 0 else 0
+                    completed_now = self.processed_count - completed_before
+                    companies_per_hour = (completed_now / elapsed_time) * 3600 if elapsed_time > 0 else 0
                     success_rate = (self.success_count / (self.processed_count or 1)) * 100
                     remaining_companies = total_companies - self.processed_count
                     estimated_time_remaining = (remaining_companies / companies_per_hour) if companies_per_hour > 0 else 0
@@ -509,7 +821,8 @@ class ToflerUltraScraper:
                         f"Success Rate: {success_rate:.1f}%\n"
                         f"Speed: {companies_per_hour:.1f} companies/hour\n"
                         f"Estimated Time Remaining: {estimated_time_remaining:.1f} hours\n"
-                        f"Failures: {self.failure_count}"
+                        f"Failures: {self.failure_count}\n"
+                        f"Fetched over HTTP: {self.http_count}, via browser: {self.browser_count}"
                     )
                 
             # Wait for remaining tasks
@@ -543,8 +856,11 @@ class ToflerUltraScraper:
         try:
             # Load companies from CSV
             df = pd.read_csv('4000_FTSIDB.csv')
-            self.companies = list(zip(df['Name'].tolist(), df['CIN'].tolist()))
+            # CINs are normalised once here; every state and store key below uses this form
+            self.companies = [(name, normalize_cin(cin)) for name, cin in zip(df['Name'].tolist(), df['CIN'].tolist())
+                              if not is_missing(cin)]
             logger.info(f"Loaded {len(self.companies)} companies")
+            self.state.add_pending(STATE_NAMESPACE, [cin for _, cin in self.companies])
             
             # Start processing
             await self.process_companies()
@@ -564,8 +880,8 @@ class ToflerUltraScraper:
         finally:
             await self.browser_manager.close_all()
 
-async def main():
-    scraper = ToflerUltraScraper(max_workers=3)
+async def main(http_first=True, refresh=False, parquet_dir=None):
+    scraper = ToflerUltraScraper(max_workers=3, http_first=http_first, refresh=refresh, parquet_dir=parquet_dir)
     try:
         await scraper.run()
     except KeyboardInterrupt:
@@ -574,7 +890,19 @@ async def main():
         logger.error(f"Error in main: {str(e)}")
     finally:
         await scraper.browser_manager.close_all()
+        scraper.fetcher.close()
+        scraper.company_store.close()
 
 if __name__ == "__main__":
-    nest_asyncio.apply()
-    asyncio.run(main()) 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Tofler company details scraper')
+    parser.add_argument('--reparse', action='store_true', help='re-extract from cached pages without network')
+    parser.add_argument('--workers', type=int, default=None, help='processes used by --reparse')
+    parser.add_argument('--browser-only', action='store_true', help='skip the plain HTTP attempt and always render')
+    parser.add_argument('--refresh', action='store_true', help='revisit only companies due according to their change history')
+    parser.add_argument('--parquet-dir', default=None, help='also write Parquet part files to this directory (needs pyarrow)')
+    args = parser.parse_args()
+    if args.reparse:
+        reparse_cache(workers=args.workers)
+    else:
+        nest_asyncio.apply()
+        asyncio.run(main(http_first=not args.browser_only, refresh=args.refresh, parquet_dir=args.parquet_dir)) 
\ No newline at end of file
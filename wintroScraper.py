@@ -1,9 +1,16 @@
 import csv
-import requests
-from bs4 import BeautifulSoup
-import time
 import re
 import os
+import argparse
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import unquote
+from http_fetcher import fetch, configure, get_fetcher
+from http_cache import HTTPCache, read_object
+from rate_limiter import get_budget, configure_host
+from reparse import reparse
+from page_parser import make_soup
+from company_store import CompanyStore
 
 def clean_company_name(name):
     # Convert to uppercase and replace spaces with hyphens
@@ -17,44 +24,65 @@ def extract_email(text):
     match = re.search(email_pattern, text)
     return match.group(0) if match else ""
 
-def scrape_company_info(company_name):
+WINTRO_BASE_URL = "http://wintro.in/company/"
+WINTRO_HOST = 'wintro.in'
+OUTPUT_FIELDS = ['company_name', 'cin', 'email']
+
+# Same average politeness as the old 1 s sleep, but lookups overlap instead of queueing
+WINTRO_RATE = 1.0
+WINTRO_THREADS = 4
+
+def parse_company_page(html):
+    """Return (cin, email) from a Wintro company page."""
+    soup = make_soup(html, scope='table')
+    
+    # Find the email in the table
+    email = ""
+    cin = ""
+    
+    # Find all table rows
+    rows = soup.find_all('tr')
+    
+    for row in rows:
+        # Find cells in the row
+        cells = row.find_all('td')
+        if len(cells) >= 2:
+            header_cell = cells[0].get_text().strip()
+            value_cell = cells[1].get_text().strip()
+            
+            # Check for Email ID
+            if 'Email ID' in header_cell:
+                email = value_cell
+            # Check for CIN
+            elif 'CIN Number' in header_cell:
+                cin = value_cell
+            if cin and email:
+                break
+    
+    # Clean up the values
+    return cin.strip(), email.strip()
+
+def scrape_company_info(company_name, pace=True):
     # Clean company name for URL
     clean_name = clean_company_name(company_name)
-    url = f"http://wintro.in/company/{clean_name}"
+    url = f"{WINTRO_BASE_URL}{clean_name}"
     
     try:
-        # Add delay to be respectful to the server
-        time.sleep(1)
-        print(f"Fetching URL: {url}")
-        response = requests.get(url)
+        # Fresh cached pages are served without touching wintro.in or its budget
+        cache = get_fetcher().cache
+        entry, body = cache.lookup(url) if cache is not None else (None, None)
+        if entry is not None and cache.is_fresh(entry):
+            print(f"Using cached page: {url}")
+            response = cache.build_response(entry, body)
+        else:
+            # Wait for a slot in wintro.in's budget (callers that already pace pass pace=False)
+            if pace:
+                get_budget(WINTRO_HOST, rate=WINTRO_RATE).acquire_blocking()
+            print(f"Fetching URL: {url}")
+            response = fetch(url)
         response.raise_for_status()
         
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Find the email in the table
-        email = ""
-        cin = ""
-        
-        # Find all table rows
-        rows = soup.find_all('tr')
-        
-        for row in rows:
-            # Find cells in the row
-            cells = row.find_all('td')
-            if len(cells) >= 2:
-                header_cell = cells[0].get_text().strip()
-                value_cell = cells[1].get_text().strip()
-                
-                # Check for Email ID
-                if 'Email ID' in header_cell:
-                    email = value_cell
-                # Check for CIN
-                elif 'CIN Number' in header_cell:
-                    cin = value_cell
-        
-        # Clean up the values
-        email = email.strip()
-        cin = cin.strip()
+        cin, email = parse_company_page(response.text)
         
         print(f"Found data - Email: {email}, CIN: {cin}")
         
@@ -72,7 +100,39 @@ def scrape_company_info(company_name):
             'email': ''
         }
 
-def main():
+def enrich_companies(companies, lookup, threads=WINTRO_THREADS, ordered=True):
+    """Run `lookup(company)` on a thread pool and yield (company, result) pairs.
+
+    With `ordered` results come back in input order; otherwise as soon as
+    each finishes. Only a few lookups per thread are queued ahead, so memory
+    stays flat however long the input is. Pacing is up to `lookup`.
+    """
+    companies = iter(companies)
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        def submit_next():
+            for company in companies:
+                pending.append((company, pool.submit(lookup, company)))
+                return
+
+        for _ in range(threads * 2):
+            submit_next()
+        while pending:
+            if ordered:
+                company, future = pending.popleft()
+            else:
+                done, _ = wait([future for _, future in pending], return_when=FIRST_COMPLETED)
+                index = next(i for i, (_, future) in enumerate(pending) if future in done)
+                company, future = pending[index]
+                del pending[index]
+            submit_next()
+            yield company, future.result()
+
+def main(threads=WINTRO_THREADS, rate=WINTRO_RATE, ordered=True):
+    # Serve previously fetched company pages from the on-disk cache, one pooled connection per thread
+    configure(cache=HTTPCache(), pool_maxsize=threads)
+    configure_host(WINTRO_HOST, rate=rate, max_in_flight=threads)
+    
     # Verify FTSIDB.csv exists
     if not os.path.exists('FTSIDB.csv'):
         print("Error: FTSIDB.csv not found!")
@@ -95,17 +155,31 @@ def main():
         print(f"Error reading FTSIDB.csv: {str(e)}")
         return
     
+    # Companies whose CIN and email are already known from any source are not fetched
+    company_store = CompanyStore()
+    
+    def lookup(company):
+        # A name several companies share is looked up, not answered with one of them
+        cin = company_store.unique_cin(company)
+        if cin and company_store.has_fields(cin, ['email']):
+            info = {'company_name': company, 'cin': cin, 'email': company_store.get(cin)['email']}
+            print(f"Already known, skipping fetch: {info}")
+            return info
+        info = scrape_company_info(company)
+        company_store.upsert(info['cin'], 'wintro', name=company, fields={'email': info['email']})
+        return info
+    
     # Create output CSV
     output_file = 'company_emails.csv'
     try:
         with open(output_file, 'w', newline='', encoding='utf-8') as file:
-            writer = csv.DictWriter(file, fieldnames=['company_name', 'cin', 'email'])
+            writer = csv.DictWriter(file, fieldnames=OUTPUT_FIELDS)
             writer.writeheader()
             
-            # Process each company
-            for i, company in enumerate(companies, 1):
-                print(f"\nProcessing company {i} of {len(companies)}: {company}")
-                info = scrape_company_info(company)
+            # Lookups run concurrently within wintro.in's budget; rows are written here, on one thread
+            results = enrich_companies(companies, lookup, threads=threads, ordered=ordered)
+            for i, (company, info) in enumerate(results, 1):
+                print(f"\nProcessed company {i} of {len(companies)}: {company}")
                 writer.writerow(info)
                 print(f"Wrote data to {output_file}: {info}")
                 print("-" * 50)
@@ -114,6 +188,43 @@ def main():
         
     except Exception as e:
         print(f"Error writing to {output_file}: {str(e)}")
+    finally:
+        company_store.close()
+
+def reparse_cached_page(job):
+    """Process-pool worker: re-extract one cached Wintro page."""
+    path, encoding, company_name = job
+    cin, email = parse_company_page(read_object(path, encoding))
+    return {
+        'company_name': company_name,
+        'cin': cin,
+        'email': email
+    }
+
+def reparse_cache(companies_file='FTSIDB.csv', output_file='company_emails_reparsed.csv', workers=None):
+    """Rebuild company_emails.csv rows from cached pages without network."""
+    names = {}
+    if os.path.exists(companies_file):
+        with open(companies_file, 'r', encoding='utf-8') as file:
+            for row in csv.reader(file):
+                if row:
+                    names[clean_company_name(row[0])] = row[0]
+    
+    jobs = []
+    for url, path, encoding in HTTPCache().iter_entries(WINTRO_BASE_URL):
+        slug = unquote(url.rstrip('/').rsplit('/', 1)[-1])
+        jobs.append((path, encoding, names.get(slug, slug)))
+    reparse(jobs, reparse_cached_page, output_file, OUTPUT_FIELDS, workers=workers)
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Wintro company email scraper')
+    parser.add_argument('--reparse', action='store_true', help='re-extract from cached pages without network')
+    parser.add_argument('--workers', type=int, default=None, help='processes used by --reparse')
+    parser.add_argument('--threads', type=int, default=WINTRO_THREADS, help='concurrent lookups')
+    parser.add_argument('--rate', type=float, default=WINTRO_RATE, help='requests per second to wintro.in')
+    parser.add_argument('--unordered', action='store_true', help='write rows as lookups finish, not in input order')
+    args = parser.parse_args()
+    if args.reparse:
+        reparse_cache(workers=args.workers)
+    else:
+        main(threads=args.threads, rate=args.rate, ordered=not args.unordered) 
\ No newline at end of file
@@ -6,21 +6,19 @@ import logging
 import pandas as pd
 import cloudscraper
 import requests
-from bs4 import BeautifulSoup
-from fake_useragent import UserAgent
 import urllib3
 import backoff
 from datetime import datetime
-import brotli
 from urllib.parse import urljoin
-import undetected_chromedriver as uc
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
-from playwright.sync_api import sync_playwright
 import json
 import sys
+import argparse
+from http_fetcher import Fetcher
+from http_cache import HTTPCache
+from reparse import iter_html_files, reparse
+from page_parser import make_soup
+from contact_extractor import NOT_AVAILABLE, extract_contact_details
+from company_store import CompanyStore
 
 # Disable SSL verification warnings
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -42,7 +40,6 @@ def check_dependencies():
         'beautifulsoup4': 'bs4',
         'pandas': 'pandas',
         'cloudscraper': 'cloudscraper',
-        'fake-useragent': 'fake_useragent',
         'urllib3': 'urllib3',
         'backoff': 'backoff'
     }
@@ -60,6 +57,101 @@ def check_dependencies():
         return False
     return True
 
+HTML_DIR = 'html_files'
+# Columns of the contact_details_*.csv output
+OUTPUT_FIELDS = ['company_name', 'email', 'phone', 'website', 'address', 'cin']
+# Contact fields recorded in the company store (the address heuristic is too loose to merge)
+STORE_FIELDS = ['email', 'phone', 'website']
+
+def raw_html_path(company_name):
+    """Path of the saved raw HTML for a company."""
+    safe_company_name = re.sub(r'[^\w\-_\. ]', '_', company_name)
+    return f'{HTML_DIR}/{safe_company_name}_raw.html'
+
+def decode_cloudflare_email(encoded_email):
+    try:
+        # Convert hex to bytes
+        encoded_bytes = bytes.fromhex(encoded_email)
+        
+        # First byte is the key to XOR with
+        key = encoded_bytes[0]
+        
+        # XOR each subsequent byte with the key
+        decoded = ''
+        for b in encoded_bytes[1:]:
+            decoded += chr(b ^ key)
+        
+        return decoded
+    except Exception as e:
+        logger.error(f"Error decoding email: {str(e)}")
+        return 'Not Available'
+
+def parse_contact_page(html):
+    """Extract email, phone, website and address from a Zauba company page.
+
+    Phone, website and address come from contact_extractor. The email in
+    the JSON-LD data or a Cloudflare-protected link is the company's own,
+    so it wins over one found in the page text.
+    """
+    soup = make_soup(html)
+    details = extract_contact_details(soup)
+    
+    # Extract email from JSON-LD structured data
+    email = NOT_AVAILABLE
+    json_ld = soup.find('script', {'type': 'application/ld+json'})
+    if json_ld:
+        try:
+            data = json.loads(json_ld.string)
+            if 'email' in data:
+                email = data['email']
+        except:
+            pass
+    
+    # If no email found in JSON-LD, try Cloudflare protected email
+    if email == NOT_AVAILABLE:
+        email_elem = soup.find('a', class_='__cf_email__')
+        if email_elem and 'data-cfemail' in email_elem.attrs:
+            encoded_email = email_elem['data-cfemail']
+            email = decode_cloudflare_email(encoded_email)
+    
+    if email != NOT_AVAILABLE:
+        details['email'] = email
+    return details
+
+def contact_row(company_name, cin, details=None):
+    """One output row; fields missing from `details` are Not Available."""
+    details = details or {}
+    row = {field: details.get(field, NOT_AVAILABLE) for field in OUTPUT_FIELDS}
+    row['company_name'] = company_name
+    row['cin'] = cin
+    return row
+
+def reparse_contact_file(job):
+    """Process-pool worker: re-extract one saved company page."""
+    path, company_name, cin = job
+    with open(path, 'r', encoding='utf-8') as f:
+        html = f.read()
+    return contact_row(company_name, cin, parse_contact_page(html))
+
+def reparse_html_files(companies_file='company_data.csv', workers=None):
+    """Rebuild contact details from html_files/ without touching the network."""
+    # Map saved file names back to the company name and CIN they were fetched for
+    known = {}
+    if os.path.exists(companies_file):
+        companies_df = pd.read_csv(companies_file)
+        for name, cin in zip(companies_df['Name'], companies_df['CIN']):
+            known[os.path.basename(raw_html_path(str(name)))] = (name, cin)
+    
+    jobs = []
+    for path in iter_html_files(HTML_DIR, suffix='_raw.html'):
+        filename = os.path.basename(path)
+        company_name, cin = known.get(filename, (filename[:-len('_raw.html')], ''))
+        jobs.append((path, company_name, cin))
+    
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    output_file = f'contact_details_{timestamp}.csv'
+    reparse(jobs, reparse_contact_file, output_file, OUTPUT_FIELDS, workers=workers)
+
 class ContactScraper:
     def __init__(self):
         # Check dependencies first
@@ -78,6 +170,10 @@ class ContactScraper:
             },
             delay=10
         )
+        # Re-runs serve company pages from the on-disk cache instead of refetching
+        self.fetcher = Fetcher(session=self.session, cache=HTTPCache())
+        # Whether the last get_contact_details answer came from the cache (no pacing needed)
+        self.last_from_cache = False
         
         # Create html_files directory if it doesn't exist
         os.makedirs('html_files', exist_ok=True)
@@ -85,40 +181,76 @@ class ContactScraper:
         # Initialize contact details list
         self.contact_details = []
         
-        # Create a UserAgent instance
-        self.ua = UserAgent()
-        
-        # Create a cloudscraper session with custom browser settings
-        self.scraper = cloudscraper.create_scraper(
-            browser={
-                'browser': 'chrome',
-                'platform': 'darwin',
-                'mobile': False
-            }
-        )
-        
-        # Set custom headers
-        self.scraper.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.5',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-            'Cache-Control': 'max-age=0'
-        })
+        # Emails any scraper already found are not fetched again
+        self.company_store = CompanyStore()
         
-        # Initialize Playwright
-        self.playwright = sync_playwright().start()
-        self.browser = self.playwright.chromium.launch(
-            headless=True,
-            args=['--ignore-certificate-errors', '--ignore-ssl-errors']
-        )
-        self.context = self.browser.new_context(
-            viewport={'width': 1920, 'height': 1080},
-            user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            ignore_https_errors=True
-        )
+        # Heavier backends are only created on first use; the normal path needs none of them
+        self._ua = None
+        self._scraper = None
+        self.playwright = None
+        self.browser = None
+        self._context = None
+
+    @property
+    def ua(self):
+        """UserAgent instance, created on first use."""
+        if self._ua is None:
+            from fake_useragent import UserAgent
+            self._ua = UserAgent()
+        return self._ua
+
+    @property
+    def scraper(self):
+        """Secondary cloudscraper session with macOS browser headers, created on first use."""
+        if self._scraper is None:
+            self._scraper = cloudscraper.create_scraper(
+                browser={
+                    'browser': 'chrome',
+                    'platform': 'darwin',
+                    'mobile': False
+                }
+            )
+            self._scraper.headers.update({
+                'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+                'Accept-Language': 'en-US,en;q=0.5',
+                'Accept-Encoding': 'gzip, deflate, br',
+                'Connection': 'keep-alive',
+                'Upgrade-Insecure-Requests': '1',
+                'Cache-Control': 'max-age=0'
+            })
+        return self._scraper
+
+    @property
+    def context(self):
+        """Playwright browser context; Chromium is only launched when this is first used."""
+        if self._context is None:
+            from playwright.sync_api import sync_playwright
+            self.playwright = sync_playwright().start()
+            self.browser = self.playwright.chromium.launch(
+                headless=True,
+                args=['--ignore-certificate-errors', '--ignore-ssl-errors']
+            )
+            self._context = self.browser.new_context(
+                viewport={'width': 1920, 'height': 1080},
+                user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+                ignore_https_errors=True
+            )
+        return self._context
+
+    def close_browser(self):
+        """Close Playwright if it was ever started."""
+        if self.playwright is None:
+            return
+        try:
+            self._context.close()
+            self.browser.close()
+            self.playwright.stop()
+        except Exception:
+            pass
+        self.playwright = None
+        self.browser = None
+        self._context = None
 
     def _get_random_delay(self):
         """Get a random delay between requests."""
@@ -163,63 +295,8 @@ class ContactScraper:
             logger.error(f"Error saving content to {filename}: {str(e)}")
             return False
 
-    def extract_contact_details(self, soup):
-        """Extract contact details from the HTML content."""
-        contact_info = {
-            'email': 'Not Available',
-            'phone': 'Not Available',
-            'address': 'Not Available',
-            'website': 'Not Available'
-        }
-        
-        # Look for contact details in various sections
-        sections = [
-            soup.find('div', {'id': 'contact-details'}),
-            soup.find('div', {'class': 'col-md-6'}),
-            soup.find('div', {'class': 'company-details'}),
-            soup.find('div', {'class': 'contact-info'})
-        ]
-        
-        # Combine all sections' text for searching
-        all_text = ''
-        for section in sections:
-            if section:
-                all_text += section.get_text() + ' '
-        
-        # Extract email
-        email_pattern = r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}'
-        email_matches = re.findall(email_pattern, all_text)
-        if email_matches:
-            contact_info['email'] = email_matches[0]
-            logger.info(f"Found email: {email_matches[0]}")
-        
-        # Extract phone
-        phone_pattern = r'(?:(?:\+|0{0,2})91(\s*[\-]\s*)?|[0]?)?[789]\d{9}'
-        phone_matches = re.findall(phone_pattern, all_text)
-        if phone_matches:
-            contact_info['phone'] = phone_matches[0]
-            logger.info(f"Found phone: {phone_matches[0]}")
-        
-        # Extract website
-        website_pattern = r'(?:https?:\/\/)?(?:www\.)?[a-zA-Z0-9-]+(?:\.[a-zA-Z]{2,})+(?:\/[^\s]*)?'
-        website_matches = re.findall(website_pattern, all_text)
-        if website_matches:
-            contact_info['website'] = website_matches[0]
-            logger.info(f"Found website: {website_matches[0]}")
-        
-        # Extract address
-        # Look for address in specific elements
-        address_elements = soup.find_all(['p', 'div', 'span'], string=re.compile(r'[A-Za-z0-9\s,\.-]+'))
-        for element in address_elements:
-            text = element.get_text(strip=True)
-            if len(text) > 20 and not re.search(email_pattern, text) and not re.search(website_pattern, text):
-                contact_info['address'] = text
-                logger.info(f"Found address: {text}")
-                break
-        
-        return contact_info
-
-    def get_contact_details(self, company_name, url, cin):
+    def get_contact_details(self, company_name, url, cin, pace=True):
+        """Fetch and parse one company page; pace=False leaves spacing to the caller's rate limiter."""
         max_retries = 3
         retry_count = 0
         
@@ -227,44 +304,25 @@ class ContactScraper:
             try:
                 self.logger.info(f"Attempt {retry_count + 1} for {company_name}")
                 
-                # Add random delay between requests
-                time.sleep(random.uniform(5, 10))
-                
-                response = self.session.get(url, timeout=30)
+                response = self.fetcher.get(url, timeout=30)
+                # Pages answered from the cache cost the site nothing, so only network fetches are paced
+                self.last_from_cache = getattr(response, 'from_cache', False)
+                if pace and not self.last_from_cache:
+                    time.sleep(random.uniform(5, 10))
                 response.raise_for_status()
                 
                 # Save raw HTML
-                safe_company_name = re.sub(r'[^\w\-_\. ]', '_', company_name)
-                raw_file_path = f'html_files/{safe_company_name}_raw.html'
+                raw_file_path = raw_html_path(company_name)
                 with open(raw_file_path, 'w', encoding='utf-8') as f:
                     f.write(response.text)
                 
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
-                # Extract email from JSON-LD structured data
-                email = 'Not Available'
-                json_ld = soup.find('script', {'type': 'application/ld+json'})
-                if json_ld:
-                    try:
-                        data = json.loads(json_ld.string)
-                        if 'email' in data:
-                            email = data['email']
-                    except:
-                        pass
-                
-                # If no email found in JSON-LD, try Cloudflare protected email
-                if email == 'Not Available':
-                    email_elem = soup.find('a', class_='__cf_email__')
-                    if email_elem and 'data-cfemail' in email_elem.attrs:
-                        encoded_email = email_elem['data-cfemail']
-                        email = self.decode_cloudflare_email(encoded_email)
+                details = parse_contact_page(response.text)
+                for field, value in details.items():
+                    if value != NOT_AVAILABLE:
+                        self.logger.info(f"Found {field}: {value}")
                 
                 self.logger.info(f"Successfully extracted contact details for {company_name}")
-                return {
-                    'company_name': company_name,
-                    'email': email,
-                    'cin': cin
-                }
+                return contact_row(company_name, cin, details)
                 
             except (requests.exceptions.RequestException, cloudscraper.exceptions.CloudflareChallengeError) as e:
                 retry_count += 1
@@ -275,36 +333,13 @@ class ContactScraper:
                     time.sleep(wait_time)
                 else:
                     self.logger.error(f"All attempts failed for {company_name}")
-                    return {
-                        'company_name': company_name,
-                        'email': 'Not Available',
-                        'cin': cin
-                    }
+                    return contact_row(company_name, cin)
             except Exception as e:
                 self.logger.error(f"Error processing {company_name}: {str(e)}")
-                return {
-                    'company_name': company_name,
-                    'email': 'Not Available',
-                    'cin': cin
-                }
+                return contact_row(company_name, cin)
 
     def decode_cloudflare_email(self, encoded_email):
-        try:
-            # Convert hex to bytes
-            encoded_bytes = bytes.fromhex(encoded_email)
-            
-            # First byte is the key to XOR with
-            key = encoded_bytes[0]
-            
-            # XOR each subsequent byte with the key
-            decoded = ''
-            for b in encoded_bytes[1:]:
-                decoded += chr(b ^ key)
-            
-            return decoded
-        except Exception as e:
-            self.logger.error(f"Error decoding email: {str(e)}")
-            return 'Not Available'
+        return decode_cloudflare_email(encoded_email)
 
     def scrape_companies(self, companies_df):
         contact_details = []
@@ -322,7 +357,17 @@ class ContactScraper:
                 logger.info(f"Company: {company_name}")
                 logger.info(f"URL: {url}")
                 
+                known = self.company_store.get(cin) if self.company_store.has_fields(cin, ['email']) else None
+                if known:
+                    logger.info(f"Email already known from {known['provenance']['email'][0]}, skipping fetch")
+                    contact_details.append(contact_row(company_name, cin, known))
+                    successful += 1
+                    continue
+                
+                self.last_from_cache = False
                 contact_info = self.get_contact_details(company_name, url, cin)
+                self.company_store.upsert(cin, 'zauba_contact', name=company_name,
+                                          fields={field: contact_info[field] for field in STORE_FIELDS} if contact_info else None)
                 
                 if contact_info:
                     contact_details.append(contact_info)
@@ -330,16 +375,13 @@ class ContactScraper:
                     logger.info(f"Successfully processed {company_name}")
                 else:
                     failed += 1
-                    contact_details.append({
-                        'company_name': company_name,
-                        'email': 'Not Available',
-                        'cin': cin
-                    })
+                    contact_details.append(contact_row(company_name, cin))
                 
-                # Random delay between requests
-                delay = random.uniform(5, 8)
-                logger.info(f"Waiting {delay:.1f} seconds before next request...")
-                time.sleep(delay)
+                # Random delay between requests that actually went to the site
+                if not self.last_from_cache:
+                    delay = random.uniform(5, 8)
+                    logger.info(f"Waiting {delay:.1f} seconds before next request...")
+                    time.sleep(delay)
         
         except KeyboardInterrupt:
             logger.info("\nScript interrupted by user")
@@ -347,12 +389,7 @@ class ContactScraper:
             logger.error(f"Error during scraping: {str(e)}")
         finally:
             # Close browser and Playwright
-            try:
-                self.context.close()
-                self.browser.close()
-                self.playwright.stop()
-            except:
-                pass
+            self.close_browser()
             
             logger.info("\nProcessing complete:")
             logger.info(f"Successful: {successful}/{total_companies}")
@@ -362,14 +399,15 @@ class ContactScraper:
             logger.info("Saving partial results...")
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             output_file = f'contact_details_{timestamp}.csv'
-            df = pd.DataFrame(contact_details)
+            df = pd.DataFrame(contact_details, columns=OUTPUT_FIELDS)
             df.to_csv(output_file, index=False)
             logger.info(f"\nSaved {len(contact_details)} contact details to {output_file}")
             
             # Print summary statistics
             logger.info("\nSummary Statistics:")
             logger.info(f"Total companies processed: {len(contact_details)}")
-            logger.info(f"Companies with email: {sum(1 for c in contact_details if c['email'] != 'Not Available')}")
+            for field in STORE_FIELDS:
+                logger.info(f"Companies with {field}: {sum(1 for c in contact_details if c[field] != NOT_AVAILABLE)}")
 
 def main():
     scraper = None
@@ -394,4 +432,11 @@ def main():
         logger.error(f"Unexpected error: {str(e)}")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Zauba contact details scraper')
+    parser.add_argument('--reparse', action='store_true', help='re-extract from saved html_files/ without network')
+    parser.add_argument('--workers', type=int, default=None, help='processes used by --reparse')
+    args = parser.parse_args()
+    if args.reparse:
+        reparse_html_files(workers=args.workers)
+    else:
+        main() 
\ No newline at end of file
@@ -1,14 +1,19 @@
-import requests
-from bs4 import BeautifulSoup
-import time
-import random
-import pandas as pd
+import argparse
 import logging
 import backoff
 import json
 import os
 import urllib3
 import cloudscraper
+from http_fetcher import Fetcher, fetch
+from crawler import PageCrawler
+from page_parser import make_soup
+from result_sink import StreamingSink
+from state_store import StateStore, DONE
+from company_store import CompanyStore
+from recrawl import RecrawlScheduler
+from pagination import discover_last_page, ListingProbe, RepeatGuard
+from rate_limiter import get_budget
 
 # Disable SSL verification warnings
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -16,8 +21,23 @@ urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Listing crawl budget: one page every ~6.5 s on average, two requests in flight
+PAGE_RATE = 1 / 6.5
+PAGES_IN_FLIGHT = 2
+LISTING_HOST = 'www.zaubacorp.com'
+
+STATE_NAMESPACE = 'zauba_pages'
+# Content hashes of individual listing rows, keyed by CIN
+ROWS_NAMESPACE = 'zauba_listing_rows'
+
+# Listing pages start at 2; pager links look like .../p-498-company.html
+FIRST_PAGE = 2
+PAGER_PATTERN = r'/p-(\d+)-company\.html'
+# Used only when neither the pager nor the search finds the end
+DEFAULT_LAST_PAGE = 498
+
 class ZaubaPageScraper:
-    def __init__(self):
+    def __init__(self, refresh=False, parquet_dir=None):
         # Create a cloudscraper session
         self.scraper = cloudscraper.create_scraper(
             browser={
@@ -26,13 +46,28 @@ class ZaubaPageScraper:
                 'mobile': False
             }
         )
+        # Route cloudscraper requests through the shared timeout handling
+        self.fetcher = Fetcher(session=self.scraper)
         
-        # Load or create session data
+        # Crawl state lives in the shared SQLite store; the JSON file is only read to migrate
         self.session_file = 'page_session_data.json'
+        self.state = StateStore()
+        resuming = self.state.has_namespace(STATE_NAMESPACE) or os.path.exists(self.session_file)
         self.load_session()
         
-        # Initialize companies list
-        self.companies = []
+        # Rows are appended as pages complete instead of kept in memory
+        self.output_file = 'zauba_companies.csv'
+        self.sink = StreamingSink(self.output_file, ['CIN', 'Name'], append=resuming, parquet_dir=parquet_dir)
+        # Every listed company is shared with the other scrapers through the company store
+        self.company_store = CompanyStore()
+        
+        # Per-page content hashes decide when a page is worth fetching again
+        self.refresh = refresh
+        self.recrawl = RecrawlScheduler(self.state, STATE_NAMESPACE)
+        self.row_hashes = RecrawlScheduler(self.state, ROWS_NAMESPACE)
+        
+        # End-of-listing probes, paced by the same budget as the crawl
+        self.probe = ListingProbe(self.fetch_listing, get_budget(LISTING_HOST, rate=PAGE_RATE, max_in_flight=PAGES_IN_FLIGHT))
         
         # Set up headers
         self.headers = {
@@ -47,181 +82,200 @@ class ZaubaPageScraper:
     def load_session(self):
         """Load or create session data."""
         try:
-            if os.path.exists(self.session_file):
+            # One-time import of a JSON checkpoint left by an older run
+            if not self.state.has_namespace(STATE_NAMESPACE) and os.path.exists(self.session_file):
                 with open(self.session_file, 'r') as f:
-                    self.session_data = json.load(f)
-            else:
-                self.session_data = {
-                    'last_page_index': 1,  # Start from page 2 (index 1)
-                    'companies': []
-                }
+                    last_page_index = json.load(f).get('last_page_index', 1)
+                with self.state.batch():
+                    self.state.set_meta(STATE_NAMESPACE, 'last_page_index', last_page_index)
+                    self.state.mark_many(STATE_NAMESPACE, range(2, last_page_index + 2), DONE)
+                logger.info(f"Migrated {self.session_file} into {self.state.path}")
+            self.session_data = {
+                'last_page_index': self.state.get_meta(STATE_NAMESPACE, 'last_page_index', 1)  # Start from page 2 (index 1)
+            }
         except Exception as e:
             logger.error(f"Error loading session: {str(e)}")
-            self.session_data = {'last_page_index': 1, 'companies': []}
+            self.session_data = {'last_page_index': 1}
 
     def save_session(self):
         """Save current session data."""
         try:
-            with open(self.session_file, 'w') as f:
-                json.dump(self.session_data, f)
+            self.state.set_meta(STATE_NAMESPACE, 'last_page_index', self.session_data['last_page_index'])
         except Exception as e:
             logger.error(f"Error saving session: {str(e)}")
 
+    def parse_listing(self, html):
+        """Extract CIN/Name rows from a listing page, or None if the table is missing."""
+        soup = make_soup(html, scope='div.container.information')
+        
+        # Find the table in the container information div
+        container_info = soup.find('div', class_='container information')
+        if not container_info:
+            return None
+        table = container_info.find('table')
+        if not table:
+            return None
+        rows = table.find_all('tr')
+        if not rows:
+            return None
+        
+        companies = []
+        # Skip header row if present
+        start_idx = 1 if len(rows) > 1 else 0
+        
+        for row in rows[start_idx:]:
+            cols = row.find_all('td')
+            if len(cols) >= 2:
+                # Extract CIN and Name from the first two columns
+                cin_element = cols[0].find('a')
+                name_element = cols[1].find('a')
+                
+                if cin_element and name_element:
+                    companies.append({
+                        'CIN': cin_element.get_text(strip=True),
+                        'Name': name_element.get_text(strip=True)
+                    })
+        return companies
+
+    def page_url(self, page_number):
+        return f'https://www.zaubacorp.com/companies-list/age-A/p-{page_number}-company.html'
+
+    def discover_last_page(self):
+        """Last listing page, read from the first page's pager or found by binary search.
+
+        Probes, the first page with the pager included, wait for the listing
+        budget like crawled pages; the pages they fetched are left in
+        self.probe.rows for the crawl to reuse.
+        """
+        return discover_last_page(FIRST_PAGE, PAGER_PATTERN, probe=self.probe)
+
     @backoff.on_exception(backoff.expo, 
                          Exception,
                          max_tries=3,
                          jitter=backoff.full_jitter)
-    def scrape_page(self, page_number):
-        """Scrape a specific page of company listings."""
+    def fetch_page(self, page_number):
+        """Fetch and parse a listing page; returns the companies on it or None."""
+        return self.fetch_listing(page_number)[1]
+
+    def fetch_listing(self, page_number):
+        """Fetch and parse a listing page; returns (html, companies), both None on failure."""
+        # Construct the URL for the page
+        url = self.page_url(page_number)
+        
+        logger.info(f"\nScraping page {page_number}: {url}")
+        
+        # Try with cloudscraper
         try:
-            # Construct the URL for the page
-            url = f'https://www.zaubacorp.com/companies-list/age-A/p-{page_number}-company.html'
-            
-            logger.info(f"\nScraping page {page_number}: {url}")
-            
-            # Try with cloudscraper
-            try:
-                response = self.scraper.get(url, headers=self.headers)
-                if response.status_code == 200:
-                    soup = BeautifulSoup(response.text, 'html.parser')
-                    
-                    # Find the table in the container information div
-                    container_info = soup.find('div', class_='container information')
-                    if container_info:
-                        table = container_info.find('table')
-                        if table:
-                            # Process the table from cloudscraper response
-                            rows = table.find_all('tr')
-                            if rows:
-                                # Skip header row if present
-                                start_idx = 1 if len(rows) > 1 else 0
-                                
-                                for row in rows[start_idx:]:
-                                    cols = row.find_all('td')
-                                    if len(cols) >= 2:
-                                        # Extract CIN and Name from the first two columns
-                                        cin_element = cols[0].find('a')
-                                        name_element = cols[1].find('a')
-                                        
-                                        if cin_element and name_element:
-                                            cin = cin_element.get_text(strip=True)
-                                            name = name_element.get_text(strip=True)
-                                            
-                                            logger.info(f"Found company: {cin} - {name}")
-                                            
-                                            self.companies.append({
-                                                'CIN': cin,
-                                                'Name': name
-                                            })
-                                
-                                # Save after successful page scrape
-                                self.save_results()
-                                self.save_session()
-                                
-                                # Random delay between requests (5-8 seconds)
-                                delay = random.uniform(5, 8)
-                                logger.info(f"Waiting {delay:.1f} seconds before next page...")
-                                time.sleep(delay)
-                                return True
-            except Exception as e:
-                logger.warning(f"Cloudscraper attempt failed: {str(e)}")
-            
-            # If cloudscraper fails, try with regular requests
-            try:
-                response = requests.get(url, headers=self.headers, verify=False)
-                if response.status_code == 200:
-                    soup = BeautifulSoup(response.text, 'html.parser')
-                    
-                    # Find the table in the container information div
-                    container_info = soup.find('div', class_='container information')
-                    if container_info:
-                        table = container_info.find('table')
-                        if table:
-                            # Process the table
-                            rows = table.find_all('tr')
-                            if rows:
-                                # Skip header row if present
-                                start_idx = 1 if len(rows) > 1 else 0
-                                
-                                for row in rows[start_idx:]:
-                                    cols = row.find_all('td')
-                                    if len(cols) >= 2:
-                                        # Extract CIN and Name from the first two columns
-                                        cin_element = cols[0].find('a')
-                                        name_element = cols[1].find('a')
-                                        
-                                        if cin_element and name_element:
-                                            cin = cin_element.get_text(strip=True)
-                                            name = name_element.get_text(strip=True)
-                                            
-                                            logger.info(f"Found company: {cin} - {name}")
-                                            
-                                            self.companies.append({
-                                                'CIN': cin,
-                                                'Name': name
-                                            })
-                                
-                                # Save after successful page scrape
-                                self.save_results()
-                                self.save_session()
-                                
-                                # Random delay between requests (5-8 seconds)
-                                delay = random.uniform(5, 8)
-                                logger.info(f"Waiting {delay:.1f} seconds before next page...")
-                                time.sleep(delay)
-                                return True
-            except Exception as e:
-                logger.warning(f"Requests attempt failed: {str(e)}")
-            
-            logger.error(f"Failed to scrape page {page_number} with both methods")
-            return False
-            
+            response = self.fetcher.get(url, headers=self.headers)
+            if response.status_code == 200:
+                companies = self.parse_listing(response.text)
+                if companies is not None:
+                    return response.text, companies
+        except Exception as e:
+            logger.warning(f"Cloudscraper attempt failed: {str(e)}")
+        
+        # If cloudscraper fails, try with regular requests
+        try:
+            response = fetch(url, headers=self.headers, verify=False)
+            if response.status_code == 200:
+                companies = self.parse_listing(response.text)
+                if companies is not None:
+                    return response.text, companies
         except Exception as e:
-            logger.error(f"Error processing page {page_number}: {str(e)}")
-            raise
-
-    def save_results(self, output_file='zauba_companies.csv'):
-        if self.companies:
-            df = pd.DataFrame(self.companies)
-            df.to_csv(output_file, index=False)
-            logger.info(f"\nSaved {len(self.companies)} companies to {output_file}")
+            logger.warning(f"Requests attempt failed: {str(e)}")
+        
+        logger.error(f"Failed to scrape page {page_number} with both methods")
+        return None, None
+
+    def record_page(self, page_number, companies):
+        """Store the companies from a scraped page and checkpoint."""
+        for company in companies:
+            logger.info(f"Found company: {company['CIN']} - {company['Name']}")
+        if self.refresh:
+            # A refresh only appends rows that are new or differ from what was last recorded
+            self.sink.write_rows([company for company in companies if self.is_new_or_changed(company)])
         else:
-            logger.warning("No companies to save")
+            self.sink.write_rows(companies)
+        self.company_store.upsert_many(
+            [{'cin': company['CIN'], 'name': company['Name']} for company in companies], 'zauba_listing'
+        )
+        
+        # Rows are fsynced before the page is marked done, in one state transaction
+        self.save_results()
+        with self.state.batch():
+            self.state.mark_done(STATE_NAMESPACE, page_number)
+            self.recrawl.record(page_number, companies)
+            self.row_hashes.record_many([(company['CIN'], company) for company in companies])
+            self.session_data['last_page_index'] = max(self.session_data['last_page_index'], page_number - 1)
+            self.save_session()
+
+    def is_new_or_changed(self, company):
+        changed = self.row_hashes.has_changed(company['CIN'], company, default=None)
+        if changed is None:
+            # Rows from before row hashes were kept: new only if no scraper has the company
+            return not self.company_store.has_fields(company['CIN'], ['name'])
+        return changed
 
-def main():
+    def scrape_page(self, page_number):
+        """Scrape a specific page of company listings."""
+        companies = self.fetch_page(page_number)
+        if companies is None:
+            return False
+        self.record_page(page_number, companies)
+        return True
+
+    def save_results(self):
+        """Make every row written so far durable before the session moves on."""
+        self.sink.checkpoint()
+        logger.info(f"\nSaved {self.sink.rows_written} companies to {self.output_file}")
+
+    def close(self):
+        self.sink.close()
+        self.state.close()
+        self.company_store.close()
+
+def main(refresh=False, last_page=None, parquet_dir=None):
     scraper = None
     try:
-        scraper = ZaubaPageScraper()
+        scraper = ZaubaPageScraper(refresh=refresh, parquet_dir=parquet_dir)
         
-        # Define the range of pages to scrape (2 to 175)
-        start_page = scraper.session_data.get('last_page_index', 1)  # Start from page 2 (index 1)
-        end_page = 497
+        # Define the range of pages to scrape (page numbers start at 2)
+        if last_page is None:
+            last_page = scraper.discover_last_page()
+        if last_page is None:
+            logger.warning(f"Could not find the last listing page, assuming {DEFAULT_LAST_PAGE}")
+            last_page = DEFAULT_LAST_PAGE
+        all_pages = range(FIRST_PAGE, last_page + 1)
         
-        logger.info(f"Starting scraping from page {start_page + 1} to {end_page}")
+        if refresh:
+            # Revisit only the pages whose revisit interval has run out
+            pages = scraper.recrawl.due(all_pages)
+            logger.info(f"Refreshing {len(pages)} due pages of {len(all_pages)}")
+        else:
+            # Resume with every page not yet done, including ones that failed last time
+            done_pages = scraper.state.keys_with_status(STATE_NAMESPACE, DONE)
+            pages = [page for page in all_pages if str(page) not in done_pages]
+            logger.info(f"Starting scraping {len(pages)} pages ({len(done_pages)} already done)")
         
-        for page_num in range(start_page, end_page + 1):
-            try:
-                logger.info(f"\nProcessing page {page_num + 1}/{end_page}")
-                success = scraper.scrape_page(page_num + 1)  # +1 because page numbers start at 2
-                
-                if success:
-                    scraper.session_data['last_page_index'] = page_num
-                    scraper.save_session()
-                else:
-                    logger.error(f"Failed to scrape page {page_num + 1}")
-                    # Add a longer delay before retrying
-                    delay = random.uniform(15, 30)
-                    logger.info(f"Waiting {delay:.1f} seconds before retrying...")
-                    time.sleep(delay)
-                    continue
-                
-            except Exception as e:
-                logger.error(f"Error processing page {page_num + 1}: {str(e)}")
-                # Add a longer delay before retrying
-                delay = random.uniform(15, 30)
-                logger.info(f"Waiting {delay:.1f} seconds before retrying...")
-                time.sleep(delay)
-                continue
+        # Stop as soon as the listing runs dry or serves the same page twice; a refresh
+        # visits due pages out of order, where neighbouring results are not consecutive pages
+        guard = None if refresh else RepeatGuard()
+        
+        def handle_page(page_number, companies, error):
+            if error is not None or companies is None:
+                logger.error(f"Failed to scrape page {page_number}")
+                scraper.state.mark_failed(STATE_NAMESPACE, page_number, error or 'listing table not found')
+                return
+            if guard is not None and guard.is_repeat(companies):
+                logger.info(f"Page {page_number} is empty or repeats the previous page, stopping")
+                return False
+            logger.info(f"\nProcessing page {page_number}/{last_page}")
+            scraper.record_page(page_number, companies)
+        
+        # Same politeness as the old 5-8 s sleep, but requests overlap instead of queueing
+        crawler = PageCrawler(LISTING_HOST, scraper.fetch_page, handle_page,
+                              rate=PAGE_RATE, max_in_flight=PAGES_IN_FLIGHT)
+        crawler.run(pages, prefetched=scraper.probe.rows)
             
     except KeyboardInterrupt:
         logger.info("\nScript interrupted by user")
@@ -229,7 +283,13 @@ def main():
         logger.error(f"Unexpected error: {str(e)}")
     finally:
         if scraper:
+            scraper.close()
             logger.info("Scraping completed or interrupted")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Zauba company listing scraper')
+    parser.add_argument('--refresh', action='store_true', help='revisit only pages due according to their change history')
+    parser.add_argument('--last-page', type=int, default=None, help='last listing page (read from the pager if omitted)')
+    parser.add_argument('--parquet-dir', default=None, help='also write Parquet part files to this directory (needs pyarrow)')
+    args = parser.parse_args()
+    main(refresh=args.refresh, last_page=args.last_page, parquet_dir=args.parquet_dir)
@@ -0,0 +1,131 @@
+import argparse
+import csv
+import logging
+import os
+import threading
+from pipeline import Pipeline, Stage
+from result_sink import StreamingSink
+from state_store import DONE
+from zauba_page_scraper_no_playwright import ZaubaPageScraper, PAGE_RATE, PAGES_IN_FLIGHT, STATE_NAMESPACE
+from zauba_contact_scraper import ContactScraper, STORE_FIELDS as CONTACT_STORE_FIELDS
+from wintroScraper import scrape_company_info
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+ZAUBA_HOST = 'www.zaubacorp.com'
+WINTRO_HOST = 'wintro.in'
+OUTPUT_FIELDS = ['CIN', 'Name', 'wintro_email', 'zauba_email']
+
+
+def read_names(path):
+    """Company names from the first column of a CSV such as FTSIDB.csv."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [row[0].strip() for row in csv.reader(f) if row and row[0].strip()]
+
+
+def build_pipeline(page_scraper, contact_scraper, sink, company_store, contact_workers=2, wintro_workers=2, wintro_rate=1.0):
+    """Listing pages -> CIN resolution -> contact enrichment, as concurrent stages.
+
+    Items are dicts: {'page': n} from the listing source, or {'Name': ...}
+    from a names file. Listing rows already carry their CIN, so only names
+    go through Wintro for resolution. Listing and contact fetches share the
+    zaubacorp.com budget, so together they never exceed the listing rate.
+    Names and emails already in the company store skip their fetch.
+    """
+    record_lock = threading.Lock()
+
+    def discover(item):
+        page_number = item['page']
+        try:
+            companies = page_scraper.fetch_page(page_number)
+            if companies is None:
+                raise RuntimeError('listing table not found')
+        except Exception as e:
+            page_scraper.state.mark_failed(STATE_NAMESPACE, page_number, e)
+            raise
+        with record_lock:
+            page_scraper.record_page(page_number, companies)
+        return companies
+
+    def needs_cin(item):
+        if item.get('CIN'):
+            return False
+        # Only a name that belongs to one company is resolved from the store; shared names are searched
+        cin = company_store.unique_cin(item['Name'])
+        if cin:
+            item['CIN'] = cin
+            return False
+        return True
+
+    def needs_email(item):
+        # A name Wintro could not resolve reaches the output with an empty CIN instead of being enriched by name alone
+        if not item.get('CIN'):
+            return False
+        if company_store.has_fields(item.get('CIN'), ['email']):
+            item['zauba_email'] = company_store.get(item['CIN'])['email']
+            return False
+        return True
+
+    def resolve(item):
+        info = scrape_company_info(item['Name'], pace=False)
+        company_store.upsert(info['cin'], 'wintro', name=item['Name'], fields={'email': info['email']})
+        return dict(item, CIN=info['cin'], wintro_email=info['email'])
+
+    def enrich(item):
+        url = contact_scraper.format_url(item['Name'], item.get('CIN'))
+        details = contact_scraper.get_contact_details(item['Name'], url, item.get('CIN'), pace=False)
+        company_store.upsert(item.get('CIN'), 'zauba_contact', name=item['Name'],
+                             fields={field: details[field] for field in CONTACT_STORE_FIELDS})
+        return dict(item, zauba_email=details['email'])
+
+    return Pipeline([
+        Stage('listing', discover, workers=PAGES_IN_FLIGHT, rate=PAGE_RATE, host=ZAUBA_HOST,
+              accepts=lambda item: 'page' in item, expand=True),
+        Stage('resolve', resolve, workers=wintro_workers, rate=wintro_rate, host=WINTRO_HOST,
+              accepts=needs_cin),
+        Stage('contacts', enrich, workers=contact_workers, rate=PAGE_RATE, host=ZAUBA_HOST,
+              accepts=needs_email),
+    ], sink=sink.write)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Discover, resolve and enrich companies as one streaming run')
+    parser.add_argument('--start-page', type=int, default=2, help='first listing page')
+    parser.add_argument('--end-page', type=int, default=None, help='last listing page (no listing pages if omitted)')
+    parser.add_argument('--names', default=None, help='CSV whose first column holds company names to resolve')
+    parser.add_argument('--output', default='pipeline_companies.csv')
+    parser.add_argument('--parquet-dir', default=None, help='also write Parquet part files to this directory (needs pyarrow)')
+    parser.add_argument('--contact-workers', type=int, default=2)
+    parser.add_argument('--wintro-workers', type=int, default=2)
+    args = parser.parse_args()
+
+    page_scraper = ZaubaPageScraper()
+    contact_scraper = ContactScraper()
+    sink = StreamingSink(args.output, OUTPUT_FIELDS, append=os.path.exists(args.output), parquet_dir=args.parquet_dir)
+    try:
+        items = []
+        if args.end_page is not None:
+            done_pages = page_scraper.state.keys_with_status(STATE_NAMESPACE, DONE)
+            items += [{'page': page} for page in range(args.start_page, args.end_page + 1)
+                      if str(page) not in done_pages]
+        if args.names:
+            items += [{'Name': name} for name in read_names(args.names)]
+        if not items:
+            logger.error("Nothing to do: pass --end-page and/or --names")
+            return
+        pipeline = build_pipeline(page_scraper, contact_scraper, sink, contact_scraper.company_store,
+                                  contact_workers=args.contact_workers, wintro_workers=args.wintro_workers)
+        count = pipeline.run(items)
+        logger.info(f"Wrote {count} companies to {args.output}")
+    except KeyboardInterrupt:
+        logger.info("\nScript interrupted by user")
+    finally:
+        sink.close()
+        page_scraper.close()
+        contact_scraper.close_browser()
+        contact_scraper.company_store.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,8 @@
+import argparse
 from playwright.sync_api import sync_playwright
 from bs4 import BeautifulSoup
 import time
 import random
-import pandas as pd
 import logging
 import backoff
 import json
@@ -11,6 +11,13 @@ import requests
 from fake_useragent import UserAgent
 import urllib3
 import cloudscraper
+from http_fetcher import Fetcher
+from page_parser import make_soup
+from result_sink import StreamingSink
+from state_store import StateStore, DONE
+from company_store import CompanyStore
+from cin_index import CinIndex
+from name_matcher import best_match, canonical_name
 
 # Disable SSL verification warnings
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -18,8 +25,10 @@ urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+STATE_NAMESPACE = 'zauba_search'
+
 class ZaubaScraper:
-    def __init__(self):
+    def __init__(self, parquet_dir=None):
         self.playwright = sync_playwright().start()
         
         # Launch browser with specific options
@@ -54,13 +63,20 @@ class ZaubaScraper:
                 'mobile': False
             }
         )
+        # Route cloudscraper requests through the shared timeout handling
+        self.fetcher = Fetcher(session=self.scraper)
         
-        # Load or create session data
+        # Crawl state lives in the shared SQLite store; the JSON file is only read to migrate
         self.session_file = 'session_data.json'
+        self.state = StateStore()
+        resuming = self.state.has_namespace(STATE_NAMESPACE) or os.path.exists(self.session_file)
         self.load_session()
         
-        # Initialize companies list
-        self.companies = []
+        # Matches are appended as searches complete instead of kept in memory
+        self.output_file = 'company_data.csv'
+        self.sink = StreamingSink(self.output_file, ['CIN', 'Name', 'Address'], append=resuming,
+                                  parquet_dir=parquet_dir)
+        self.company_store = CompanyStore()
         
         # Set default timeout
         self.page.set_default_timeout(30000)
@@ -102,23 +118,23 @@ class ZaubaScraper:
     def load_session(self):
         """Load or create session data."""
         try:
-            if os.path.exists(self.session_file):
+            # One-time import of a JSON checkpoint left by an older run
+            if not self.state.has_namespace(STATE_NAMESPACE) and os.path.exists(self.session_file):
                 with open(self.session_file, 'r') as f:
-                    self.session_data = json.load(f)
-            else:
-                self.session_data = {
-                    'last_company_index': 0,
-                    'companies': []
-                }
+                    last_company_index = json.load(f).get('last_company_index', 0)
+                self.state.set_meta(STATE_NAMESPACE, 'last_company_index', last_company_index)
+                logger.info(f"Migrated {self.session_file} into {self.state.path}")
+            self.session_data = {
+                'last_company_index': self.state.get_meta(STATE_NAMESPACE, 'last_company_index', 0)
+            }
         except Exception as e:
             logger.error(f"Error loading session: {str(e)}")
-            self.session_data = {'last_company_index': 0, 'companies': []}
+            self.session_data = {'last_company_index': 0}
 
     def save_session(self):
         """Save current session data."""
         try:
-            with open(self.session_file, 'w') as f:
-                json.dump(self.session_data, f)
+            self.state.set_meta(STATE_NAMESPACE, 'last_company_index', self.session_data['last_company_index'])
         except Exception as e:
             logger.error(f"Error saving session: {str(e)}")
 
@@ -141,6 +157,39 @@ class ZaubaScraper:
         except Exception as e:
             logger.warning(f"Error in simulate_human_behavior: {str(e)}")
 
+    def select_matches(self, company_name, rows):
+        """Pick the search result rows that are this company.
+
+        Every row whose canonical name equals the query is kept, so 'PVT LTD'
+        and 'PRIVATE LIMITED' agree; failing that, the one row that scores at
+        or above the matcher threshold and clearly beats the runner-up.
+        """
+        candidates = []
+        for row in rows:
+            cols = row.find_all('td')
+            if len(cols) >= 3:
+                candidates.append({
+                    'CIN': cols[0].get_text(strip=True),
+                    'Name': cols[1].get_text(strip=True),
+                    'Address': cols[2].get_text(strip=True)
+                })
+        if not candidates:
+            return []
+        query = canonical_name(company_name)
+        exact = [c for c in candidates if canonical_name(c['Name']) == query]
+        for match in exact:
+            logger.info(f"Found exact match: {match['Name']} (CIN: {match['CIN']})")
+        if exact:
+            return exact
+        # A results page is small enough to score every row
+        best, score = best_match(company_name, [c['Name'] for c in candidates])
+        if best is None:
+            logger.info(f"No result clearly matches '{company_name}' (best score {score:.2f}), rejecting")
+            return []
+        match = candidates[best]
+        logger.info(f"Found fuzzy match: {match['Name']} (CIN: {match['CIN']}, score {score:.2f})")
+        return [match]
+
     @backoff.on_exception(backoff.expo, 
                          Exception,
                          max_tries=3,
@@ -160,9 +209,9 @@ class ZaubaScraper:
             
             # First try with cloudscraper
             try:
-                response = self.scraper.get(url)
+                response = self.fetcher.get(url)
                 if response.status_code == 200:
-                    soup = BeautifulSoup(response.text, 'html.parser')
+                    soup = make_soup(response.text, scope='table')
                     table = soup.find('table')
                     if table:
                         # Process the table from cloudscraper response
@@ -170,22 +219,7 @@ class ZaubaScraper:
                         if rows:
                             # Skip header row if present
                             start_idx = 1 if len(rows) > 1 else 0
-                            
-                            for row in rows[start_idx:]:
-                                cols = row.find_all('td')
-                                if len(cols) >= 3:
-                                    cin = cols[0].get_text(strip=True)
-                                    name = cols[1].get_text(strip=True)
-                                    address = cols[2].get_text(strip=True)
-                                    
-                                    # Only add if name matches exactly (case-insensitive)
-                                    if name.upper() == company_name.upper():
-                                        logger.info(f"Found exact match: {name} (CIN: {cin})")
-                                        self.companies.append({
-                                            'CIN': cin,
-                                            'Name': name,
-                                            'Address': address
-                                        })
+                            self.record_matches(self.select_matches(company_name, rows[start_idx:]))
                             
                             # Save after successful search
                             self.save_results()
@@ -224,22 +258,7 @@ class ZaubaScraper:
             
             # Skip header row if present
             start_idx = 1 if len(rows) > 1 else 0
-            
-            for row in rows[start_idx:]:
-                cols = row.find_all('td')
-                if len(cols) >= 3:
-                    cin = cols[0].get_text(strip=True)
-                    name = cols[1].get_text(strip=True)
-                    address = cols[2].get_text(strip=True)
-                    
-                    # Only add if name matches exactly (case-insensitive)
-                    if name.upper() == company_name.upper():
-                        logger.info(f"Found exact match: {name} (CIN: {cin})")
-                        self.companies.append({
-                            'CIN': cin,
-                            'Name': name,
-                            'Address': address
-                        })
+            self.record_matches(self.select_matches(company_name, rows[start_idx:]))
             
             # Save after each successful search
             self.save_results()
@@ -264,13 +283,48 @@ class ZaubaScraper:
             logger.error(f"Error loading company names: {str(e)}")
             return []
 
-    def save_results(self, output_file='company_data.csv'):
-        if self.companies:
-            df = pd.DataFrame(self.companies)
-            df.to_csv(output_file, index=False)
-            logger.info(f"\nSaved {len(self.companies)} companies to {output_file}")
-        else:
-            logger.warning("No companies to save")
+    def record_matches(self, matches):
+        """Write matched search rows to the output and the company store."""
+        self.sink.write_rows(matches)
+        self.company_store.upsert_many(
+            [{'cin': m['CIN'], 'name': m['Name'], 'registered_address': m['Address']} for m in matches], 'zauba_search'
+        )
+
+    def known_rows(self, company_name):
+        """Output rows for a name the company store already has a CIN for."""
+        rows = []
+        for cin in self.company_store.resolve_name(company_name):
+            record = self.company_store.get(cin) or {}
+            rows.append({'CIN': cin, 'Name': record.get('name', company_name),
+                         'Address': record.get('registered_address', '')})
+        return rows
+
+    def resolve_offline(self, company_names, index):
+        """Record names the company store or local CIN index can answer; returns the names that still need a search."""
+        resolved = {}
+        unknown = []
+        for company_name in company_names:
+            rows = self.known_rows(company_name)
+            if rows:
+                resolved[company_name] = (rows, 1.0)
+            else:
+                unknown.append(company_name)
+        found, missing = index.resolve_many(unknown) if len(index) else ({}, unknown)
+        resolved.update(found)
+        for company_name, (rows, score) in resolved.items():
+            for row in rows:
+                logger.info(f"Resolved offline: {company_name} -> {row['Name']} (CIN: {row['CIN']}, score {score:.2f})")
+            self.sink.write_rows(rows)
+        self.save_results()
+        with self.state.batch():
+            self.state.mark_many(STATE_NAMESPACE, resolved, DONE)
+        logger.info(f"Resolved {len(resolved)} companies from the local index, {len(missing)} left to search")
+        return missing
+
+    def save_results(self):
+        """Make every row written so far durable before the session moves on."""
+        self.sink.checkpoint()
+        logger.info(f"\nSaved {self.sink.rows_written} companies to {self.output_file}")
 
     def cleanup_and_recover(self):
         """Clean up browser state and recover from errors."""
@@ -290,6 +344,12 @@ class ZaubaScraper:
     def close(self):
         """Close the browser and clean up resources."""
         try:
+            if hasattr(self, 'sink'):
+                self.sink.close()
+            if hasattr(self, 'state'):
+                self.state.close()
+            if hasattr(self, 'company_store'):
+                self.company_store.close()
             if hasattr(self, 'browser'):
                 self.browser.close()
             if hasattr(self, 'playwright'):
@@ -297,27 +357,42 @@ class ZaubaScraper:
         except Exception as e:
             logger.error(f"Error closing browser: {str(e)}")
 
-def main():
+def main(parquet_dir=None):
     scraper = None
     try:
-        scraper = ZaubaScraper()
+        scraper = ZaubaScraper(parquet_dir=parquet_dir)
         company_names = scraper.load_company_names()
         if not company_names:
             logger.error("No company names loaded. Exiting.")
             return
 
-        # Start from last processed company if available
+        # Skip companies already searched; failed ones are retried
+        done = scraper.state.keys_with_status(STATE_NAMESPACE, DONE)
         start_index = scraper.session_data.get('last_company_index', 0)
-        logger.info(f"Resuming from company {start_index + 1}")
+        if start_index and not done:
+            # A migrated JSON checkpoint only knew how far the last run got
+            scraper.state.mark_many(STATE_NAMESPACE, company_names[:start_index], DONE)
+            done = set(company_names[:start_index])
+        logger.info(f"Resuming with {len(done)} companies already done")
 
-        for i, company_name in enumerate(company_names[start_index:], start_index + 1):
+        # Names already seen in the listing crawl never need a search request
+        index = CinIndex.from_files()
+        pending = [name for name in company_names if name not in done]
+        done |= set(pending) - set(scraper.resolve_offline(pending, index))
+
+        for i, company_name in enumerate(company_names, 1):
+            if company_name in done:
+                continue
             try:
                 logger.info(f"\nProcessing {i}/{len(company_names)}")
                 scraper.search_companies(company_name)
-                scraper.session_data['last_company_index'] = i
-                scraper.save_session()
+                with scraper.state.batch():
+                    scraper.state.mark_done(STATE_NAMESPACE, company_name)
+                    scraper.session_data['last_company_index'] = i
+                    scraper.save_session()
             except Exception as e:
                 logger.error(f"Error processing company {i}: {str(e)}")
+                scraper.state.mark_failed(STATE_NAMESPACE, company_name, e)
                 # Try to recover
                 if not scraper.cleanup_and_recover():
                     logger.error("Failed to recover. Exiting.")
@@ -334,4 +409,7 @@ def main():
             logger.info("Browser closed and resources cleaned up")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Zauba company search scraper')
+    parser.add_argument('--parquet-dir', default=None, help='also write Parquet part files to this directory (needs pyarrow)')
+    args = parser.parse_args()
+    main(parquet_dir=args.parquet_dir)